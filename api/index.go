@@ -8,14 +8,21 @@
 package handler
 
 import (
+	"bytes"
+	"compress/flate"
 	"context"
+	"encoding/base64"
+	"encoding/binary"
 	"encoding/json"
 	"fmt"
+	"hash/crc32"
+	"io"
 	"net/http"
 	"net/url"
 	"os"
 	"strconv"
 	"strings"
+	"sync"
 	"time"
 
 	"github.com/redis/go-redis/v9"
@@ -26,6 +33,50 @@ var (
 	ctx = context.Background()
 )
 
+// Key holding the live KV generation, written by full rebuilds
+const generationKey = "current_generation"
+
+// How long the live generation is cached before being read again
+const generationTTL = 5 * time.Second
+
+var (
+	generationMu        sync.Mutex
+	generationPrefix    string
+	generationFetchedAt time.Time
+)
+
+// Platform keys are fields of bucket hashes instead of string keys when
+// the generator writes with KV_LAYOUT=hash
+var hashLayout = os.Getenv("KV_LAYOUT") == "hash"
+
+// Hashes per platform in the hash layout, must match HASH_BUCKETS in
+// generator/incremental_kv_ingest.py
+const hashBuckets = 1024
+
+// Key of the deflate dictionary within a generation
+const dictionaryKey = "codec_dict"
+
+// Value tags written by generator/kv_codec.py, JSON values are untagged
+const (
+	deflateTag = 0x02
+	textTag    = '~'
+)
+
+// Anime fields compact codecs leave out when null, put back for responses
+var recordFields = []string{
+	"title", "myanimelist", "anilist", "anidb", "kitsu", "animenewsnetwork",
+	"animeplanet", "anisearch", "annict", "imdb", "livechart", "notify",
+	"otakotaku", "shikimori", "shoboi", "silveryasha", "simkl", "themoviedb",
+	"kaize", "kaize_id", "nautiljon", "nautiljon_id", "trakt", "trakt_type",
+	"trakt_season",
+}
+
+// Deflate dictionaries by ID, they never change once written
+var (
+	dictionaryMu sync.Mutex
+	dictionaries = map[uint32][]byte{}
+)
+
 // Platform synonyms mapping
 var platformSynonyms = map[string][]string{
 	"anidb":            {"ad", "adb", "anidb.net"},
@@ -203,13 +254,47 @@ func resolvePlatform(platform string) string {
 	return platform
 }
 
+// keyPrefix returns the key prefix of the live KV generation, "" for keys
+// written before generations existed. The last known prefix is kept when
+// the pointer cannot be read.
+func keyPrefix() string {
+	generationMu.Lock()
+	defer generationMu.Unlock()
+
+	if time.Since(generationFetchedAt) < generationTTL {
+		return generationPrefix
+	}
+
+	generation, err := rdb.Get(ctx, generationKey).Result()
+	switch {
+	case err == redis.Nil:
+		generationPrefix = ""
+	case err != nil:
+		return generationPrefix
+	default:
+		generationPrefix = "g" + generation + ":"
+	}
+	generationFetchedAt = time.Now()
+	return generationPrefix
+}
+
+// resolveMapping returns the internal ID a platform ID maps to, stored
+// either under "platform/id" or in field "id" of hash "platform:bucket".
+func resolveMapping(prefix, platform, id string) (string, error) {
+	if hashLayout {
+		bucket := crc32.ChecksumIEEE([]byte(id)) % hashBuckets
+		return rdb.HGet(ctx, fmt.Sprintf("%s%s:%d", prefix, platform, bucket), id).Result()
+	}
+	return rdb.Get(ctx, fmt.Sprintf("%s%s/%s", prefix, platform, id)).Result()
+}
+
 func getAnimeData(platform, id string) (map[string]interface{}, error) {
 	id = strings.TrimSuffix(id, ".json")
 	id = strings.TrimSuffix(id, ".html")
 	id, _ = url.QueryUnescape(id)
 
-	platformKey := fmt.Sprintf("%s/%s", platform, id)
-	internalIDStr, err := rdb.Get(ctx, platformKey).Result()
+	prefix := keyPrefix()
+	internalIDStr, err := resolveMapping(prefix, platform, id)
 	if err != nil {
 		return nil, err
 	}
@@ -219,19 +304,90 @@ func getAnimeData(platform, id string) (map[string]interface{}, error) {
 		return nil, fmt.Errorf("invalid internal ID: %v", err)
 	}
 
-	animeDataStr, err := rdb.Get(ctx, fmt.Sprintf("%d", internalID)).Result()
+	value, err := rdb.Get(ctx, fmt.Sprintf("%s%d", prefix, internalID)).Bytes()
+	if err != nil {
+		return nil, err
+	}
+
+	return decodeAnimeData(prefix, value)
+}
+
+// unwrapValue undoes the base64 wrapping of binary values written to
+// text-only stores
+func unwrapValue(value []byte) ([]byte, error) {
+	if len(value) > 0 && value[0] == textTag {
+		return base64.StdEncoding.DecodeString(string(value[1:]))
+	}
+	return value, nil
+}
+
+// decodeAnimeData decodes a stored anime value of any codec
+func decodeAnimeData(prefix string, value []byte) (map[string]interface{}, error) {
+	value, err := unwrapValue(value)
 	if err != nil {
 		return nil, err
 	}
+	if len(value) == 0 {
+		return nil, fmt.Errorf("empty anime data")
+	}
 
 	var animeData map[string]interface{}
-	if err := json.Unmarshal([]byte(animeDataStr), &animeData); err != nil {
+	switch value[0] {
+	case deflateTag:
+		if len(value) < 5 {
+			return nil, fmt.Errorf("truncated deflate value")
+		}
+		var dictionary []byte
+		dictionary, err = getDictionary(prefix, binary.BigEndian.Uint32(value[1:5]))
+		if err != nil {
+			return nil, err
+		}
+		var payload []byte
+		payload, err = io.ReadAll(flate.NewReaderDict(bytes.NewReader(value[5:]), dictionary))
+		if err == nil {
+			err = json.Unmarshal(payload, &animeData)
+		}
+	default:
+		err = json.Unmarshal(value, &animeData)
+	}
+	if err != nil {
 		return nil, err
 	}
 
+	for _, field := range recordFields {
+		if _, ok := animeData[field]; !ok {
+			animeData[field] = nil
+		}
+	}
 	return animeData, nil
 }
 
+// getDictionary returns the deflate dictionary with the given ID, read
+// from the generation on first use
+func getDictionary(prefix string, id uint32) ([]byte, error) {
+	dictionaryMu.Lock()
+	defer dictionaryMu.Unlock()
+
+	if dictionary, ok := dictionaries[id]; ok {
+		return dictionary, nil
+	}
+
+	value, err := rdb.Get(ctx, prefix+dictionaryKey).Bytes()
+	if err != nil {
+		return nil, err
+	}
+	dictionary, err := unwrapValue(value)
+	if err != nil {
+		return nil, err
+	}
+	if crc32.ChecksumIEEE(dictionary) != id {
+		return nil, fmt.Errorf("deflate dictionary %08x not found", id)
+	}
+
+	dictionaries[id] = dictionary
+	return dictionary, nil
+}
+
 func writeJSON(w http.ResponseWriter, data interface{}, status int) {
 	w.WriteHeader(status)
 	json.NewEncoder(w).Encode(data)
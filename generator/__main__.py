@@ -12,6 +12,7 @@ import sys
 import os
 import argparse
 from datetime import datetime
+from typing import Dict
 
 # Add current directory to Python path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -21,6 +22,8 @@ from generator.const import (
     pprint,
     CACHE_DIR,
     DATABASE_URL,
+    DB_MAX_OVERFLOW,
+    DB_POOL_SIZE,
     GITHUB_TOKEN,
     KAIZE_SESSION,
     KAIZE_XSRF_TOKEN,
@@ -30,7 +33,9 @@ from generator.const import (
     REDIS_HOST,
     KV_REST_API_URL,
     KV_REST_API_TOKEN,
+    MATCH_REPLAY,
 )
+from generator.kv_codec import KV_CODECS
 from generator.prettyprint import Platform, Status
 
 
@@ -93,7 +98,9 @@ def check_environment_variables():
     pprint.print(Platform.SYSTEM, Status.INFO, "")
 
 
-def run_full_pipeline(db_path: str, cache_dir: str):
+def run_full_pipeline(
+    db_path: str, cache_dir: str, pool: Dict[str, int], replay_links: bool
+):
     """Run the complete pipeline (download, process, KV sync)."""
     pprint.print(Platform.SYSTEM, Status.INFO, "Running full pipeline...")
     pprint.print(Platform.SYSTEM, Status.INFO, f"Database: {db_path}")
@@ -104,7 +111,12 @@ def run_full_pipeline(db_path: str, cache_dir: str):
     pprint.print(Platform.SYSTEM, Status.INFO, "-" * 60)
 
     try:
-        with SQLAlchemyPipeline(db_path, cache_dir) as pipeline:
+        with SQLAlchemyPipeline(
+            db_path,
+            cache_dir,
+            **pool,
+            replay_links=replay_links,
+        ) as pipeline:
             result = pipeline.run_full_pipeline()
 
             if result["success"]:
@@ -203,7 +215,9 @@ def run_full_pipeline(db_path: str, cache_dir: str):
         return False
 
 
-def run_download_phase(db_path: str, cache_dir: str, ignore_cache: bool = False):
+def run_download_phase(
+    db_path: str, cache_dir: str, pool: Dict[str, int], ignore_cache: bool = False
+):
     """Run download phase only."""
     pprint.print(Platform.SYSTEM, Status.INFO, "Running download phase...")
     pprint.print(Platform.SYSTEM, Status.INFO, f"Database: {db_path}")
@@ -215,7 +229,11 @@ def run_download_phase(db_path: str, cache_dir: str, ignore_cache: bool = False)
     pprint.print(Platform.SYSTEM, Status.INFO, "-" * 60)
 
     try:
-        with SQLAlchemyPipeline(db_path, cache_dir) as pipeline:
+        with SQLAlchemyPipeline(
+            db_path,
+            cache_dir,
+            **pool,
+        ) as pipeline:
             result = pipeline.run_download_phase(ignore_cache=ignore_cache)
 
             if result["success"]:
@@ -273,7 +291,9 @@ def run_download_phase(db_path: str, cache_dir: str, ignore_cache: bool = False)
         return False
 
 
-def run_process_phase(db_path: str, cache_dir: str):
+def run_process_phase(
+    db_path: str, cache_dir: str, pool: Dict[str, int], replay_links: bool
+):
     """Run processing phase only."""
     pprint.print(Platform.SYSTEM, Status.INFO, "Running processing phase...")
     pprint.print(Platform.SYSTEM, Status.INFO, f"Database: {db_path}")
@@ -284,7 +304,12 @@ def run_process_phase(db_path: str, cache_dir: str):
     pprint.print(Platform.SYSTEM, Status.INFO, "-" * 60)
 
     try:
-        with SQLAlchemyPipeline(db_path, cache_dir) as pipeline:
+        with SQLAlchemyPipeline(
+            db_path,
+            cache_dir,
+            **pool,
+            replay_links=replay_links,
+        ) as pipeline:
             result = pipeline.run_processing_phase()
 
             if result["success"]:
@@ -330,7 +355,9 @@ def run_process_phase(db_path: str, cache_dir: str):
         return False
 
 
-def run_ingest_phase(db_path: str, force_overwrite_all: bool = False):
+def run_ingest_phase(
+    db_path: str, pool: Dict[str, int], force_overwrite_all: bool = False
+):
     """Run KV ingestion phase only."""
     pprint.print(Platform.SYSTEM, Status.INFO, "Running KV ingestion phase...")
     pprint.print(Platform.SYSTEM, Status.INFO, f"Database: {db_path}")
@@ -343,7 +370,10 @@ def run_ingest_phase(db_path: str, force_overwrite_all: bool = False):
     pprint.print(Platform.SYSTEM, Status.INFO, "-" * 60)
 
     try:
-        with SQLAlchemyPipeline(db_path) as pipeline:
+        with SQLAlchemyPipeline(
+            db_path,
+            **pool,
+        ) as pipeline:
             result = pipeline.run_kv_ingestion_phase(
                 force_overwrite_all=force_overwrite_all
             )
@@ -386,14 +416,17 @@ def run_ingest_phase(db_path: str, force_overwrite_all: bool = False):
         return False
 
 
-def get_pipeline_status(db_path: str):
+def get_pipeline_status(db_path: str, pool: Dict[str, int], codec_report: bool = False):
     """Get and display pipeline status."""
     pprint.print(Platform.SYSTEM, Status.INFO, "Getting pipeline status...")
     pprint.print(Platform.SYSTEM, Status.INFO, f"Database: {db_path}")
     pprint.print(Platform.SYSTEM, Status.INFO, "-" * 60)
 
     try:
-        with SQLAlchemyPipeline(db_path) as pipeline:
+        with SQLAlchemyPipeline(
+            db_path,
+            **pool,
+        ) as pipeline:
             status = pipeline.get_status()
 
             pprint.print(
@@ -450,6 +483,26 @@ def get_pipeline_status(db_path: str):
             else:
                 pprint.print(Platform.SYSTEM, Status.INFO, "No sync history found")
 
+            if codec_report:
+                report = pipeline.get_codec_report()
+                records = max(report["records"], 1)
+                pprint.print(
+                    Platform.SYSTEM,
+                    Status.INFO,
+                    f"KV value sizes for {report['records']} records:",
+                )
+                for codec in KV_CODECS:
+                    pprint.print(
+                        Platform.SYSTEM,
+                        Status.INFO,
+                        f"  {codec}: {report[codec]} bytes ({report[codec] / records:.0f} per record, {report[codec] / max(report['json'], 1):.0%} of json)",
+                    )
+                pprint.print(
+                    Platform.SYSTEM,
+                    Status.INFO,
+                    f"  deflate dictionary: {report['dictionary']} bytes",
+                )
+
             return True
 
     except Exception as e:
@@ -487,7 +540,7 @@ def prune_cache(cache_dir: str):
         return False
 
 
-def prune_database(db_path: str):
+def prune_database(db_path: str, pool: Dict[str, int]):
     """Prune PostgreSQL database."""
     pprint.print(Platform.SYSTEM, Status.INFO, f"Pruning database: {db_path}")
 
@@ -498,7 +551,10 @@ def prune_database(db_path: str):
         return True
 
     try:
-        with SQLAlchemyPipeline(db_path) as pipeline:
+        with SQLAlchemyPipeline(
+            db_path,
+            **pool,
+        ) as pipeline:
             pipeline.prune_database()
             pprint.print(Platform.SYSTEM, Status.PASS, "Database pruned successfully")
         return True
@@ -531,7 +587,7 @@ def prune_redis():
         return False
 
 
-def prune_all(db_path: str, cache_dir: str):
+def prune_all(db_path: str, cache_dir: str, pool: Dict[str, int]):
     """Prune all data (cache, database, and Redis)."""
     pprint.print(
         Platform.SYSTEM, Status.INFO, "Pruning ALL data (cache, database, and Redis)..."
@@ -547,7 +603,7 @@ def prune_all(db_path: str, cache_dir: str):
 
     success = True
     success &= prune_cache(cache_dir)
-    success &= prune_database(db_path)
+    success &= prune_database(db_path, pool)
     success &= prune_redis()
 
     if success:
@@ -558,19 +614,49 @@ def prune_all(db_path: str, cache_dir: str):
     return success
 
 
+def pool_options(args: argparse.Namespace) -> Dict[str, int]:
+    """Get the connection pool keyword arguments of SQLAlchemyPipeline."""
+    return {
+        "pool_size": getattr(args, "db_pool_size", DB_POOL_SIZE),
+        "max_overflow": getattr(args, "db_max_overflow", DB_MAX_OVERFLOW),
+    }
+
+
 def main():
     """Main entry point."""
     parser = argparse.ArgumentParser(
         description="SQLAlchemy-based anime data pipeline", prog="python -m generator"
     )
 
+    # Database options of every command that opens the database
+    database_parser = argparse.ArgumentParser(add_help=False)
+    database_parser.add_argument("--database-url", help="PostgreSQL database URL")
+    database_parser.add_argument(
+        "--db-pool-size",
+        type=int,
+        default=DB_POOL_SIZE,
+        help="PostgreSQL connection pool size",
+    )
+    database_parser.add_argument(
+        "--db-max-overflow",
+        type=int,
+        default=DB_MAX_OVERFLOW,
+        help="PostgreSQL pool overflow connections",
+    )
+
     # Create subparsers for commands
     subparsers = parser.add_subparsers(dest="command", help="Available commands")
 
     # Full command (default)
-    full_parser = subparsers.add_parser("full", help="Run complete pipeline (default)")
-    full_parser.add_argument("--database-url", help="PostgreSQL database URL")
+    full_parser = subparsers.add_parser(
+        "full", help="Run complete pipeline (default)", parents=[database_parser]
+    )
     full_parser.add_argument("--cache-dir", help="Cache directory path")
+    full_parser.add_argument(
+        "--full-relink",
+        action="store_true",
+        help="Relink every platform instead of replaying unchanged phases",
+    )
     full_parser.add_argument("--redis-url", help="Redis connection URL")
     full_parser.add_argument("--redis-host", help="Redis host")
     full_parser.add_argument("--redis-port", type=int, help="Redis port")
@@ -585,8 +671,9 @@ def main():
     )
 
     # Download command
-    download_parser = subparsers.add_parser("download", help="Run download phase only")
-    download_parser.add_argument("--database-url", help="PostgreSQL database URL")
+    download_parser = subparsers.add_parser(
+        "download", help="Run download phase only", parents=[database_parser]
+    )
     download_parser.add_argument("--cache-dir", help="Cache directory path")
     download_parser.add_argument(
         "--ignore-cache",
@@ -598,16 +685,23 @@ def main():
     )
 
     # Process command
-    process_parser = subparsers.add_parser("process", help="Run processing phase only")
-    process_parser.add_argument("--database-url", help="PostgreSQL database URL")
+    process_parser = subparsers.add_parser(
+        "process", help="Run processing phase only", parents=[database_parser]
+    )
     process_parser.add_argument("--cache-dir", help="Cache directory path")
+    process_parser.add_argument(
+        "--full-relink",
+        action="store_true",
+        help="Relink every platform instead of replaying unchanged phases",
+    )
     process_parser.add_argument(
         "--no-env-check", action="store_true", help="Skip environment variable checks"
     )
 
     # Ingest command
-    ingest_parser = subparsers.add_parser("ingest", help="Run KV ingestion phase only")
-    ingest_parser.add_argument("--database-url", help="PostgreSQL database URL")
+    ingest_parser = subparsers.add_parser(
+        "ingest", help="Run KV ingestion phase only", parents=[database_parser]
+    )
     ingest_parser.add_argument("--redis-url", help="Redis connection URL")
     ingest_parser.add_argument("--redis-host", help="Redis host")
     ingest_parser.add_argument("--redis-port", type=int, help="Redis port")
@@ -625,8 +719,14 @@ def main():
     )
 
     # Status command
-    status_parser = subparsers.add_parser("status", help="Check pipeline status")
-    status_parser.add_argument("--database-url", help="PostgreSQL database URL")
+    status_parser = subparsers.add_parser(
+        "status", help="Check pipeline status", parents=[database_parser]
+    )
+    status_parser.add_argument(
+        "--codec-report",
+        action="store_true",
+        help="Report the KV bytes of all records with each value codec",
+    )
     status_parser.add_argument(
         "--no-env-check", action="store_true", help="Skip environment variable checks"
     )
@@ -642,13 +742,15 @@ def main():
     )
     cache_prune_parser.add_argument("--cache-dir", help="Cache directory path")
 
-    db_prune_parser = prune_subparsers.add_parser("database", help="Prune database")
-    db_prune_parser.add_argument("--database-url", help="PostgreSQL database URL")
+    db_prune_parser = prune_subparsers.add_parser(
+        "database", help="Prune database", parents=[database_parser]
+    )
 
     prune_subparsers.add_parser("redis", help="Prune Redis/KV store")
 
-    all_prune_parser = prune_subparsers.add_parser("all", help="Prune all data")
-    all_prune_parser.add_argument("--database-url", help="PostgreSQL database URL")
+    all_prune_parser = prune_subparsers.add_parser(
+        "all", help="Prune all data", parents=[database_parser]
+    )
     all_prune_parser.add_argument("--cache-dir", help="Cache directory path")
 
     # Parse arguments
@@ -665,6 +767,12 @@ def main():
         else DATABASE_URL
     )
 
+    # Configure the shared connection pool
+    pool = pool_options(args)
+
+    # Replaying stored links is opt-in and --full-relink always turns it off
+    replay_links = MATCH_REPLAY and not getattr(args, "full_relink", False)
+
     # Configure cache directory
     cache_dir = (
         args.cache_dir if hasattr(args, "cache_dir") and args.cache_dir else CACHE_DIR
@@ -678,24 +786,24 @@ def main():
     success = False
 
     if args.command == "full":
-        success = run_full_pipeline(db_path, cache_dir)
+        success = run_full_pipeline(db_path, cache_dir, pool, replay_links)
     elif args.command == "download":
-        success = run_download_phase(db_path, cache_dir, args.ignore_cache)
+        success = run_download_phase(db_path, cache_dir, pool, args.ignore_cache)
     elif args.command == "process":
-        success = run_process_phase(db_path, cache_dir)
+        success = run_process_phase(db_path, cache_dir, pool, replay_links)
     elif args.command == "ingest":
-        success = run_ingest_phase(db_path, args.force_overwrite_all)
+        success = run_ingest_phase(db_path, pool, args.force_overwrite_all)
     elif args.command == "status":
-        success = get_pipeline_status(db_path)
+        success = get_pipeline_status(db_path, pool, args.codec_report)
     elif args.command == "prune":
         if args.prune_target == "cache":
             success = prune_cache(cache_dir)
         elif args.prune_target == "database":
-            success = prune_database(db_path)
+            success = prune_database(db_path, pool)
         elif args.prune_target == "redis":
             success = prune_redis()
         elif args.prune_target == "all":
-            success = prune_all(db_path, cache_dir)
+            success = prune_all(db_path, cache_dir, pool)
         else:
             pprint.print(
                 Platform.SYSTEM,
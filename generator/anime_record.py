@@ -6,13 +6,36 @@ Anime record data structures.
 """
 
 import hashlib
-from typing import Optional
-from dataclasses import dataclass
+from operator import attrgetter
+from typing import Any, Dict, Optional
+from dataclasses import dataclass, field, fields
 
+import xxhash
 
-@dataclass
+HASH_ALGORITHMS = ("sha256", "xxh3")
+"""Supported data_hash algorithms, sha256 being the legacy default"""
+
+XXH3_PREFIX = "xxh3:"
+"""Prefix marking xxh3 digests, sha256 digests are unprefixed"""
+
+
+def hash_algorithm_of(data_hash: Optional[str]) -> Optional[str]:
+    """Get the algorithm a stored data_hash was computed with."""
+    if not data_hash:
+        return None
+    if data_hash.startswith(XXH3_PREFIX):
+        return "xxh3"
+    # Unprefixed values predate configurable hashing
+    return "sha256"
+
+
+@dataclass(slots=True)
 class AnimeRecord:
-    """Represents a structured anime record for database storage."""
+    """Represents a structured anime record for database storage.
+
+    Slotted to drop the per-instance __dict__, as every AOD entry is held
+    in memory from extraction through KV ingestion.
+    """
 
     title: str
 
@@ -53,18 +76,56 @@ class AnimeRecord:
     # Internal tracking
     data_hash: Optional[str] = None
 
-    def compute_hash(self) -> str:
-        """Compute SHA256 hash of record data for change detection."""
-        # Create a consistent string representation of the record
-        data_str = (
-            f"{self.title}|{self.myanimelist}|{self.anilist}|{self.anidb}|{self.kitsu}|"
-        )
-        data_str += f"{self.animenewsnetwork}|{self.animeplanet}|{self.anisearch}|{self.annict}|"
-        data_str += f"{self.imdb}|{self.livechart}|{self.notify}|{self.otakotaku}|{self.shikimori}|"
-        data_str += f"{self.shoboi}|{self.silveryasha}|{self.simkl}|{self.themoviedb}|"
-        data_str += (
-            f"{self.kaize}|{self.kaize_id}|{self.nautiljon}|{self.nautiljon_id}|"
-        )
-        data_str += f"{self.trakt}|{self.trakt_type}|{self.trakt_season}"
-
-        return hashlib.sha256(data_str.encode("utf-8")).hexdigest()
+    # Memoized compute_hash result, cleared by __setattr__ on field changes
+    _digest: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        """Set a field, dropping the memoized digest if it covers the field."""
+        if name not in _UNHASHED_ATTRIBUTES:
+            _object_setattr(self, "_digest", None)
+        _object_setattr(self, name, value)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the record fields as a dict.
+
+        Shallow equivalent of dataclasses.asdict, all fields are scalars.
+        """
+        return dict(zip(RECORD_FIELDS, _get_record_values(self)))
+
+    def compute_hash(self, algorithm: str = "sha256") -> str:
+        """Compute the hash of record data for change detection.
+
+        The result is memoized until a hashed field changes. "sha256"
+        yields the legacy unprefixed hex digest, "xxh3" a faster
+        non-cryptographic 128-bit digest prefixed with "xxh3:".
+        """
+        digest = self._digest
+        if digest is not None and hash_algorithm_of(digest) == algorithm:
+            return digest
+
+        # "title|myanimelist|...|trakt_season", None rendered as "None"
+        data = "|".join(map(str, _get_hashed_values(self))).encode("utf-8")
+        if algorithm == "sha256":
+            digest = hashlib.sha256(data).hexdigest()
+        elif algorithm == "xxh3":
+            digest = XXH3_PREFIX + xxhash.xxh3_128_hexdigest(data)
+        else:
+            raise ValueError(f"Unsupported hash algorithm: {algorithm}")
+
+        self._digest = digest
+        return digest
+
+
+RECORD_FIELDS = tuple(f.name for f in fields(AnimeRecord) if f.init)
+"""Names of all AnimeRecord fields, in declaration order"""
+
+HASHED_FIELDS = tuple(name for name in RECORD_FIELDS if name != "data_hash")
+"""Fields covered by compute_hash, in hashing order"""
+
+# Assigning anything but these invalidates the memoized digest
+_UNHASHED_ATTRIBUTES = frozenset(("data_hash", "_digest"))
+_object_setattr = object.__setattr__
+
+# Split as attrgetter is only typed for at least one explicit name
+_get_record_values = attrgetter(RECORD_FIELDS[0], *RECORD_FIELDS[1:])
+_get_hashed_values = attrgetter(HASHED_FIELDS[0], *HASHED_FIELDS[1:])
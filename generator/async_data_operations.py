@@ -0,0 +1,113 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# Copyright 2025 tajoumaru
+
+"""
+Asyncio database operations using SQLAlchemy with PostgreSQL over asyncpg.
+Lets the pipeline overlap database round trips with KV and network I/O.
+"""
+
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+
+from generator.anime_record import AnimeRecord
+from generator.const import DATABASE_URL
+from generator.data_operations import (
+    ANIME_COLUMNS,
+    BulkOperations,
+    ChangeSet,
+    record_pairs,
+)
+from generator.database import create_async_database_engine
+from generator.models import Anime, ChangeLog
+
+
+class AsyncSQLAlchemyOperations(BulkOperations):
+    """Asyncio counterpart of SQLAlchemyOperations.
+
+    Exposes the change tracking surface of SQLAlchemyOperations as
+    coroutines. Detection and bulk writes reuse the synchronous
+    implementations through AsyncSession.run_sync, so both modes apply
+    changes identically.
+    """
+
+    def __init__(
+        self, db_path: str = DATABASE_URL, engine: Optional[AsyncEngine] = None
+    ):
+        """Initialize with database path, or a shared async engine."""
+        self.db_path = db_path
+        self._owns_engine = engine is None
+        self.engine = (
+            engine if engine is not None else create_async_database_engine(db_path)
+        )
+        # Returned ORM objects stay readable after their session closes
+        self.Session = async_sessionmaker(self.engine, expire_on_commit=False)
+
+    async def detect_changes(self, new_records: List[AnimeRecord]) -> ChangeSet:
+        """Detect changes between new records and existing database."""
+        async with self.Session() as session:
+            return await session.run_sync(self._detect_changes, new_records)
+
+    async def apply_changes(self, changeset: ChangeSet) -> None:
+        """Apply changes to the database using efficient bulk operations."""
+        async with self.Session() as session:
+            await session.run_sync(self._apply_changes, changeset)
+
+    async def get_pending_changes(self) -> List[ChangeLog]:
+        """Get unprocessed change log entries."""
+        async with self.Session() as session:
+            result = await session.execute(
+                select(ChangeLog)
+                .where(~ChangeLog.processed)
+                .order_by(ChangeLog.created_at)
+            )
+            return list(result.scalars().all())
+
+    async def mark_changes_processed(self, change_ids: List[int]) -> None:
+        """Mark change log entries as processed."""
+        if not change_ids:
+            return
+
+        BATCH_SIZE = 1000
+
+        async with self.Session() as session:
+            for i in range(0, len(change_ids), BATCH_SIZE):
+                batch = change_ids[i : i + BATCH_SIZE]
+                await session.execute(
+                    update(ChangeLog)
+                    .where(ChangeLog.id.in_(batch))
+                    .values(processed=True, processed_at=func.now())
+                )
+            await session.commit()
+
+    async def get_anime_records(self, anime_ids: List[int]) -> Dict[int, AnimeRecord]:
+        """Get anime records by ID, IDs without a row being left out."""
+        if not anime_ids:
+            return {}
+
+        columns = [Anime.id, *(getattr(Anime, col) for col in ANIME_COLUMNS)]
+        async with self.Session() as session:
+            result = await session.execute(
+                select(*columns).where(Anime.id.in_(anime_ids))
+            )
+            return dict(record_pairs(result.all()))
+
+    async def iter_anime_records(
+        self, chunk_size: int = 5000
+    ) -> AsyncIterator[List[Tuple[int, AnimeRecord]]]:
+        """Stream all anime records in chunks of (id, AnimeRecord)."""
+        columns = [Anime.id, *(getattr(Anime, col) for col in ANIME_COLUMNS)]
+        async with self.Session() as session:
+            result = await session.stream(
+                select(*columns)
+                .order_by(Anime.id)
+                .execution_options(yield_per=chunk_size)
+            )
+            async for rows in result.partitions():
+                yield record_pairs(rows)
+
+    async def close(self) -> None:
+        """Close database connection."""
+        if self._owns_engine:
+            await self.engine.dispose()
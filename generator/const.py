@@ -58,14 +58,60 @@ def process_database_url(url: str | None = None) -> str:
 # Process the URL
 DATABASE_URL = process_database_url(DATABASE_URL)
 
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+"""Connections kept in the shared PostgreSQL pool, 0 disables pooling"""
+
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+"""Connections the pool may open beyond DB_POOL_SIZE under load"""
+
 # Cache configuration
 CACHE_DIR = os.getenv("CACHE_DIR", "cache")
 """Cache directory for downloaded files"""
 
+# Link replay
+MATCH_REPLAY = os.getenv("MATCH_REPLAY", "").lower() in ["true", "1", "yes"]
+"""Replay stored links of matching phases whose source files are unchanged"""
+
+# Record hashing
+RECORD_HASH_ALGORITHM = os.getenv("RECORD_HASH_ALGORITHM", "sha256")
+"""Algorithm for anime record data hashes: sha256, or the faster opt-in xxh3"""
+
+# Change detection
+CHANGE_DETECTION_MODE = os.getenv("CHANGE_DETECTION_MODE", "client")
+"""Where record changes are detected: client (Python) or server (SQL merge)"""
+
+# Async database access
+DATABASE_ASYNC = os.getenv("DATABASE_ASYNC", "").lower() in ["true", "1", "yes"]
+"""Run change detection and KV ingestion over asyncpg, overlapping reads with KV writes"""
+
+# Change log retention
+CHANGE_LOG_RETENTION_DAYS = int(os.getenv("CHANGE_LOG_RETENTION_DAYS", "30"))
+"""Days processed change log entries are kept before being pruned"""
+
+# Bulk load format
+COPY_FORMAT = os.getenv("COPY_FORMAT", "text")
+"""COPY format for bulk loads: text (TSV buffer) or binary (streamed)"""
+
 # Scraper cache expiry
 SCRAPER_CACHE_EXPIRY_DAYS = int(os.getenv("SCRAPER_CACHE_EXPIRY_DAYS", "14"))
 """Number of days to cache scraper data before re-running"""
 
+# KV store generations
+KV_GENERATION_GRACE_SECONDS = int(os.getenv("KV_GENERATION_GRACE_SECONDS", "3600"))
+"""Seconds a replaced KV generation stays readable after a full rebuild"""
+
+# KV store layout
+KV_LAYOUT = os.getenv("KV_LAYOUT", "keys")
+"""Platform key layout: keys (a string key each) or hash (bucketed hashes)"""
+
+# KV value codec
+KV_CODEC = os.getenv("KV_CODEC", "json")
+"""Anime data codec: json, compact (JSON without nulls) or deflate"""
+
+# KV write concurrency
+KV_WRITE_CONCURRENCY = int(os.getenv("KV_WRITE_CONCURRENCY", "4"))
+"""Maximum number of KV batches written at once, 1 writes them in sequence"""
+
 # Redis configuration - Upstash
 KV_REST_API_URL = os.getenv("KV_REST_API_URL")
 """Upstash Redis REST API URL"""
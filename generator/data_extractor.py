@@ -12,18 +12,73 @@ Parses JSON files and extracts individual fields for database storage.
 
 import json
 import os
-from typing import List, Dict, Optional
+from typing import Any, Callable, Iterator, List, Dict, Optional, TextIO, Tuple
 
-from generator.const import pprint
+from generator.const import MATCH_REPLAY, RECORD_HASH_ALGORITHM, pprint
 from generator.prettyprint import Platform, Status
 from generator.anime_record import AnimeRecord
 
 
+def _extract_numeric_id(path: str) -> Optional[int]:
+    """Extract the last numeric segment of a URL path."""
+    try:
+        for part in reversed(path.split("/")):
+            if part.isdigit():
+                return int(part)
+        return None
+    except Exception:
+        return None
+
+
+def _extract_last_segment(path: str) -> str:
+    """Extract the last segment of a URL path (slugs, base64 IDs)."""
+    return path.rsplit("/", 1)[-1]
+
+
+def _extract_query_id(path: str) -> Optional[int]:
+    """Extract the ID from an id= URL parameter."""
+    # https://animenewsnetwork.com/encyclopedia/anime.php?id=25117
+    if "id=" in path:
+        return int(path.split("id=")[-1])
+    return None
+
+
+SOURCE_PREFIXES: Dict[str, Tuple[str, Callable[[str], Any]]] = {
+    "https://anidb.net/anime": ("anidb", _extract_numeric_id),
+    "https://anilist.co/anime": ("anilist", _extract_numeric_id),
+    "https://anime-planet.com/anime": ("animeplanet", _extract_last_segment),
+    "https://anisearch.com/anime": ("anisearch", _extract_numeric_id),
+    "https://kitsu.io/anime": ("kitsu", _extract_numeric_id),
+    "https://kitsu.app/anime": ("kitsu", _extract_numeric_id),
+    "https://livechart.me/anime": ("livechart", _extract_numeric_id),
+    "https://myanimelist.net/anime": ("myanimelist", _extract_numeric_id),
+    "https://notify.moe/anime": ("notify", _extract_last_segment),
+    "https://simkl.com/anime": ("simkl", _extract_numeric_id),
+    "https://animenewsnetwork.com": ("animenewsnetwork", _extract_query_id),
+}
+"""AOD source URL prefix to the record field and the extractor of the rest"""
+
+_SOURCE_PREFIX_SCAN = tuple(f"{prefix}/" for prefix in SOURCE_PREFIXES)
+
+
+def _match_nested_source(
+    source: str,
+) -> Tuple[Optional[Tuple[str, Callable[[str], Any]]], str]:
+    """Resolve a source URL that is not "<prefix>/<id>" by scanning prefixes."""
+    # Unsupported sites are rejected in a single C call
+    if source.startswith(_SOURCE_PREFIX_SCAN):
+        for prefix in _SOURCE_PREFIX_SCAN:
+            if source.startswith(prefix):
+                return SOURCE_PREFIXES[prefix[:-1]], source[len(prefix) :]
+    return None, source
+
+
 class DataExtractor:
     """Extracts structured data from JSON files."""
 
-    def __init__(self, cache_dir: str | None = None):
+    def __init__(self, cache_dir: str | None = None, replay_links: bool = MATCH_REPLAY):
         self.cache_dir = cache_dir
+        self.replay_links = replay_links
         self.platform_field_mapping = {
             "animenewsnetwork": "animenewsnetwork",
             "animeplanet": "animeplanet",
@@ -46,9 +101,23 @@ class DataExtractor:
             Platform.SYSTEM, Status.INFO, "Extracting anime data from cached files..."
         )
 
-        # Start with AOD data as the base
-        aod_data = self._load_aod_data(cache_files.get("aod.json"))
-        if not aod_data:
+        # Start with AOD data as the base, converting entries as they stream
+        # in so the raw JSON document is never held in memory
+        records = []
+        try:
+            for entry in self._iter_aod_data(cache_files.get("aod.json")):
+                record = self._create_base_record(entry)
+                if record:
+                    records.append(record)
+        except Exception as e:
+            pprint.print(
+                Platform.ANIMEOFFLINEDATABASE,
+                Status.ERR,
+                f"Error loading AOD data: {e}",
+            )
+            records = []
+
+        if not records:
             pprint.print(
                 Platform.ANIMEOFFLINEDATABASE,
                 Status.ERR,
@@ -56,50 +125,33 @@ class DataExtractor:
             )
             return []
 
-        # Convert AOD data to AnimeRecord objects
-        records = []
-        for entry in aod_data:
-            record = self._create_base_record(entry)
-            if record:
-                records.append(record)
-
         # Use DataMatcher for comprehensive data matching
         if self.cache_dir:
             from generator.data_matcher import DataMatcher
 
-            matcher = DataMatcher(self.cache_dir)
-            records = matcher.enhance_records(records)
+            with DataMatcher(self.cache_dir, self.replay_links) as matcher:
+                records = matcher.enhance_records(records)
         else:
             # Fallback to simple platform data enhancement
             self._enhance_with_platform_data(records, cache_files)
 
         # Compute hashes for all records
         for record in records:
-            record.data_hash = record.compute_hash()
+            record.data_hash = record.compute_hash(RECORD_HASH_ALGORITHM)
 
         pprint.print(
             Platform.SYSTEM, Status.PASS, f"Extracted {len(records)} anime records"
         )
         return records
 
-    def _load_aod_data(self, aod_file: Optional[str]) -> List[Dict]:
-        """Load anime offline database data."""
+    def _iter_aod_data(self, aod_file: Optional[str]) -> Iterator[Dict]:
+        """Stream anime offline database entries one at a time."""
         if not aod_file or not os.path.exists(aod_file):
-            return []
-
-        try:
-            with open(aod_file, "r", encoding="utf-8") as f:
-                data = json.load(f)
+            return
 
+        with open(aod_file, "r", encoding="utf-8") as f:
             # AOD structure: {"data": [...]}
-            return data.get("data", [])
-        except Exception as e:
-            pprint.print(
-                Platform.ANIMEOFFLINEDATABASE,
-                Status.ERR,
-                f"Error loading AOD data: {e}",
-            )
-            return []
+            yield from iter_json_array(f, "data")
 
     def _create_base_record(self, entry: Dict) -> Optional[AnimeRecord]:
         """Create base AnimeRecord from AOD entry."""
@@ -109,42 +161,33 @@ class DataExtractor:
             if not title:
                 return None
 
-            # Create record with basic fields
-            record = AnimeRecord(title=title)
-
             # Extract platform IDs from sources using the same logic as legacy simplify_aod_data
-            sources = entry.get("sources", [])
-            for source in sources:
-                if source.startswith("https://anidb.net/anime/"):
-                    record.anidb = self._extract_id_from_url(source)
-                elif source.startswith("https://anilist.co/anime/"):
-                    record.anilist = self._extract_id_from_url(source)
-                elif source.startswith("https://anime-planet.com/anime/"):
-                    record.animeplanet = source.split("/")[-1]  # Extract slug, not ID
-                elif source.startswith("https://anisearch.com/anime/"):
-                    record.anisearch = self._extract_id_from_url(source)
-                elif source.startswith("https://kitsu.io/anime/") or source.startswith(
-                    "https://kitsu.app/anime/"
-                ):
-                    record.kitsu = self._extract_id_from_url(source)
-                elif source.startswith("https://livechart.me/anime/"):
-                    record.livechart = self._extract_id_from_url(source)
-                elif source.startswith("https://myanimelist.net/anime/"):
-                    record.myanimelist = self._extract_id_from_url(source)
-                elif source.startswith("https://notify.moe/anime/"):
-                    record.notify = source.split("/")[
-                        -1
-                    ]  # Extract base64 string, not ID
-                elif source.startswith("https://simkl.com/anime/"):
-                    record.simkl = self._extract_id_from_url(source)
-                elif source.startswith("https://animenewsnetwork.com/"):
-                    # Extract ID from URL parameter: https://animenewsnetwork.com/encyclopedia/anime.php?id=25117
-                    if "id=" in source:
-                        record.animenewsnetwork = int(source.split("id=")[-1])
+            fields = {}
+            for source in entry.get("sources", []):
+                # Canonical URLs are "<prefix>/<id>", a single dict lookup
+                cut = source.rfind("/")
+                target = SOURCE_PREFIXES.get(source[:cut])
+                if target is None:
+                    target, path = _match_nested_source(source)
+                    if target is None:
+                        continue
+                else:
+                    path = source[cut + 1 :]
+
+                field, extract = target
+                if extract is _extract_numeric_id and path.isdecimal():
+                    fields[field] = int(path)
+                    continue
+                value = extract(path)
+                if value is not None:
+                    fields[field] = value
 
             # Set shikimori to same as myanimelist (they use the same IDs)
-            if record.myanimelist:
-                record.shikimori = record.myanimelist
+            if fields.get("myanimelist"):
+                fields["shikimori"] = fields["myanimelist"]
+
+            # Create record with basic fields
+            record = AnimeRecord(title=title, **fields)
 
             return record
         except Exception as e:
@@ -278,17 +321,109 @@ class DataExtractor:
                 return base_name
             return None
 
-    def _extract_id_from_url(self, url: str) -> Optional[int]:
-        """Extract numeric ID from URL."""
-        try:
-            # Find the last numeric part in the URL
-            parts = url.split("/")
-            for part in reversed(parts):
-                if part.isdigit():
-                    return int(part)
-            return None
-        except Exception:
-            return None
+
+_VALUE_DELIMITERS = frozenset(",:]} \t\r\n")
+
+
+class _JSONStreamReader:
+    """Decodes JSON tokens and values from a text stream, one chunk at a time."""
+
+    def __init__(self, f: TextIO, chunk_size: int):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        """Append the next chunk to the unread part of the buffer."""
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos :] + chunk
+        self.pos = 0
+        return True
+
+    def next_char(self) -> str:
+        """Consume and return the next non-whitespace character."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buf):
+                self.pos += 1
+                return self.buf[self.pos - 1]
+            if not self.fill():
+                raise ValueError("Unexpected end of JSON document")
+
+    def peek_char(self) -> str:
+        """Return the next non-whitespace character without consuming it."""
+        char = self.next_char()
+        self.pos -= 1
+        return char
+
+    def decode(self) -> Any:
+        """Consume and return the next complete JSON value."""
+        self.peek_char()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+                # A number cut at the chunk boundary ("1." of "1.5") decodes
+                # too, only a following delimiter proves the value complete
+                if (
+                    end < len(self.buf) and self.buf[end] in _VALUE_DELIMITERS
+                ) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            if not self.fill():
+                value, self.pos = self.decoder.raw_decode(self.buf, self.pos)
+                return value
+
+
+def iter_json_array(f: TextIO, key: str, chunk_size: int = 1 << 20) -> Iterator[Any]:
+    """Yield the items of a top-level object's array member from a text stream.
+
+    Only one chunk of the document and the item being decoded are held in
+    memory; other top-level members are decoded and discarded.
+    """
+    reader = _JSONStreamReader(f, chunk_size)
+
+    if reader.next_char() != "{":
+        raise ValueError("Expected a JSON object")
+    if reader.peek_char() == "}":
+        return
+
+    while True:
+        name = reader.decode()
+        if reader.next_char() != ":":
+            raise ValueError(f"Expected ':' after {name!r}")
+
+        if name != key:
+            reader.decode()
+        elif reader.next_char() != "[":
+            raise ValueError(f"Expected {key!r} to be an array")
+        elif reader.peek_char() == "]":
+            reader.next_char()
+        else:
+            while True:
+                yield reader.decode()
+                char = reader.next_char()
+                if char == "]":
+                    break
+                if char != ",":
+                    raise ValueError(f"Expected ',' or ']' in {key!r}")
+
+        char = reader.next_char()
+        if char == "}":
+            return
+        if char != ",":
+            raise ValueError("Expected ',' or '}' between members")
 
 
 def extract_anime_data(
@@ -12,24 +12,111 @@ Handles fuzzy matching, cross-platform ID linking, and manual mappings.
 
 import json
 import os
-from typing import List, Dict, Optional, Tuple
+from typing import Any, Callable, List, Dict, Optional, Tuple
 from multiprocessing import Pool, cpu_count
+from multiprocessing.pool import Pool as PoolType
 
-from fuzzywuzzy import fuzz
+import numpy as np
+from rapidfuzz import fuzz
+
+# The stub only declares cdist when numpy imports, which it always does here
+from rapidfuzz.process import cdist  # ty: ignore[possibly-unbound-import]
 from slugify import slugify
 
 from generator.const import pprint
 from generator.prettyprint import Platform, Status
 from generator.anime_record import AnimeRecord
+from generator.match_cache import (
+    FuzzyMatchCache,
+    LinkChange,
+    LinkState,
+    MatchEntry,
+    base_fingerprint,
+    corpus_fingerprint,
+    files_fingerprint,
+)
+from generator.title_index import TitleBlockingIndex, normalize_title
+
+# Number of unlinked items scored together in one score matrix
+FUZZY_BATCH_SIZE = 32
+
+# Scores at or above this stop the in-order scan for a better candidate
+FUZZY_EARLY_ACCEPT = 95
+
+# Linking phases in the order they run: the source files each one reads,
+# the record fields it writes, and the earlier phases whose output it reads
+# or overwrites (those force it to run again when they do)
+MATCH_PHASES: Dict[str, Dict[str, Tuple[str, ...]]] = {
+    "arm": {
+        "files": ("arm.json",),
+        "fields": ("myanimelist", "anilist", "shoboi", "annict"),
+        "depends": (),
+    },
+    "anitrakt": {
+        "files": ("anitrakt_tv.json",),
+        "fields": ("trakt", "trakt_type", "trakt_season"),
+        "depends": ("arm",),
+    },
+    "fribb": {
+        "files": ("fribb_animelists.json",),
+        "fields": ("imdb", "themoviedb"),
+        "depends": (),
+    },
+    "silveryasha": {
+        "files": ("silveryasha.json",),
+        "fields": ("silveryasha",),
+        "depends": (),
+    },
+    "otakotaku": {
+        "files": ("otakotaku.json",),
+        "fields": ("otakotaku",),
+        "depends": (),
+    },
+    "kaize": {
+        "files": ("kaize.json",),
+        "fields": ("kaize", "kaize_id"),
+        "depends": (),
+    },
+    "nautiljon": {
+        "files": ("nautiljon.json",),
+        "fields": ("nautiljon", "nautiljon_id"),
+        "depends": (),
+    },
+    "manual": {
+        "files": (
+            "kaize_manual.json",
+            "otakotaku_manual.json",
+            "silveryasha_manual.json",
+        ),
+        "fields": ("kaize", "kaize_id", "otakotaku", "silveryasha"),
+        "depends": ("kaize", "otakotaku", "silveryasha"),
+    },
+}
+
+# Title corpus published once to each worker process by _init_fuzzy_worker
+_worker_title_index: Optional[TitleBlockingIndex] = None
+
+
+def _init_fuzzy_worker(title_index: TitleBlockingIndex) -> None:
+    """Pool initializer that keeps the AOD title index in the worker."""
+    global _worker_title_index
+    _worker_title_index = title_index
 
 
 class DataMatcher:
     """Matches and combines anime data from multiple sources."""
 
-    def __init__(self, cache_dir: str):
+    def __init__(self, cache_dir: str, incremental: bool = False):
         self.cache_dir = cache_dir
+        # Replay the stored links of phases whose inputs are unchanged
+        self.incremental = incremental
         self.platform_data = {}
         self.manual_mappings = {}
+        self.title_index: Optional[TitleBlockingIndex] = None
+        self.pool: Optional[PoolType] = None
+        # Set while enhance_records shares one pool across its phases
+        self.share_pool = False
+        self.match_cache: Optional[FuzzyMatchCache] = None
 
     def enhance_records(self, records: List[AnimeRecord]) -> List[AnimeRecord]:
         """Enhance records with matched data from all platforms."""
@@ -37,35 +124,114 @@ class DataMatcher:
             Platform.SYSTEM, Status.INFO, "Starting data matching and enhancement..."
         )
 
-        # Load all platform data and manual mappings
-        self._load_platform_data()
-        self._load_manual_mappings()
-
         # Create lookup indexes
         mal_lookup = {r.myanimelist: r for r in records if r.myanimelist}
         anilist_lookup = {r.anilist: r for r in records if r.anilist}
         anidb_lookup = {r.anidb: r for r in records if r.anidb}
         title_lookup = {r.title: r for r in records}
 
-        # Phase 1: Combine data using direct ID matches
-        self._combine_arm_data(records, mal_lookup, anilist_lookup)
-        self._combine_anitrakt_data(records, mal_lookup)
-        self._combine_fribb_data(records, anidb_lookup)
+        phases: Dict[str, Callable[[], None]] = {
+            # Phase 1: Combine data using direct ID matches
+            "arm": lambda: self._combine_arm_data(records, mal_lookup, anilist_lookup),
+            "anitrakt": lambda: self._combine_anitrakt_data(records, mal_lookup),
+            "fribb": lambda: self._combine_fribb_data(records, anidb_lookup),
+            # Phase 2: Link data using fuzzy matching, sharing one worker pool
+            "silveryasha": lambda: self._link_silveryasha_data(
+                records, mal_lookup, title_lookup
+            ),
+            "otakotaku": lambda: self._link_otakotaku_data(records, title_lookup),
+            "kaize": lambda: self._link_kaize_data(records, title_lookup),
+            "nautiljon": lambda: self._link_nautiljon_data(records, title_lookup),
+            # Phase 3: Apply manual mappings
+            "manual": lambda: self._apply_manual_mappings(records, title_lookup),
+        }
+
+        # Phases whose sources and dependencies are unchanged since the last
+        # run replay their stored changes instead of linking again
+        link_state = None
+        if self.incremental:
+            link_state = LinkState(self.cache_dir, base_fingerprint(records))
+
+        sources = {}
+        stored_changes: Dict[str, List[LinkChange]] = {}
+        for phase, spec in MATCH_PHASES.items():
+            sources[phase] = files_fingerprint(self.cache_dir, spec["files"])
+            changes = None
+            if link_state and all(dep in stored_changes for dep in spec["depends"]):
+                changes = link_state.get_changes(phase, sources[phase])
+            if changes is not None:
+                stored_changes[phase] = changes
+
+        # Only load the data of phases that actually run
+        self._load_platform_data(
+            [phase for phase in phases if phase not in stored_changes]
+        )
+        if "manual" not in stored_changes:
+            self._load_manual_mappings()
+
+        self._reset_fuzzy_state()
+        self.share_pool = True
+        try:
+            for phase, run in phases.items():
+                if phase in stored_changes:
+                    self._replay_changes(records, stored_changes[phase])
+                    pprint.print(
+                        Platform.SYSTEM,
+                        Status.INFO,
+                        f"Reused {len(stored_changes[phase])} stored {phase} links (source unchanged)",
+                    )
+                    continue
 
-        # Phase 2: Link data using fuzzy matching
-        self._link_silveryasha_data(records, mal_lookup, title_lookup)
-        self._link_otakotaku_data(records, title_lookup)
-        self._link_kaize_data(records, title_lookup)
-        self._link_nautiljon_data(records, title_lookup)
+                changes = self._record_changes(
+                    records, MATCH_PHASES[phase]["fields"], run
+                )
+                if link_state:
+                    link_state.set_changes(phase, sources[phase], changes)
+        finally:
+            self.share_pool = False
+            self._close_pool()
 
-        # Phase 3: Apply manual mappings
-        self._apply_manual_mappings(records, title_lookup)
+        if self.match_cache:
+            self.match_cache.save()
+        if link_state:
+            link_state.save()
 
         pprint.print(Platform.SYSTEM, Status.PASS, f"Enhanced {len(records)} records")
         return records
 
-    def _load_platform_data(self):
-        """Load all platform data files."""
+    def _record_changes(
+        self,
+        records: List[AnimeRecord],
+        fields: Tuple[str, ...],
+        run: Callable[[], None],
+    ) -> List[LinkChange]:
+        """Run a linking phase and collect the field values it changed."""
+        before = [tuple(getattr(r, field) for field in fields) for r in records]
+        run()
+
+        changes = []
+        for index, record in enumerate(records):
+            after = tuple(getattr(record, field) for field in fields)
+            if after != before[index]:
+                changed: Dict[str, Any] = {
+                    field: value
+                    for field, value, old in zip(fields, after, before[index])
+                    if value != old
+                }
+                changes.append((index, changed))
+        return changes
+
+    def _replay_changes(
+        self, records: List[AnimeRecord], changes: List[LinkChange]
+    ) -> None:
+        """Apply the field values a linking phase changed in a previous run."""
+        for index, fields in changes:
+            record = records[index]
+            for field, value in fields.items():
+                setattr(record, field, value)
+
+    def _load_platform_data(self, platforms: Optional[List[str]] = None):
+        """Load platform data files, all of them unless platforms is given."""
         platform_files = {
             "arm": "arm.json",
             "anitrakt": "anitrakt_tv.json",  # Use TV data by default
@@ -77,6 +243,9 @@ class DataMatcher:
         }
 
         for platform, filename in platform_files.items():
+            if platforms is not None and platform not in platforms:
+                continue
+
             filepath = os.path.join(self.cache_dir, filename)
             if os.path.exists(filepath):
                 try:
@@ -273,7 +442,9 @@ class DataMatcher:
                 Status.INFO,
                 f"Fuzzy matching {len(unlinked)} unlinked items",
             )
-            matches = self._fuzzy_match_parallel(unlinked, records, threshold=85)
+            matches = self._fuzzy_match_parallel(
+                "kaize", unlinked, records, threshold=85
+            )
 
             for kz_item, record in matches:
                 record.kaize = kz_item["slug"]
@@ -313,7 +484,9 @@ class DataMatcher:
                 Status.INFO,
                 f"Fuzzy matching {len(unlinked)} unlinked items",
             )
-            matches = self._fuzzy_match_parallel(unlinked, records, threshold=90)
+            matches = self._fuzzy_match_parallel(
+                "nautiljon", unlinked, records, threshold=90
+            )
 
             for nj_item, record in matches:
                 record.nautiljon = nj_item["slug"]
@@ -355,6 +528,7 @@ class DataMatcher:
                 f"Fuzzy matching {len(unlinked)} unlinked items",
             )
             matches = self._fuzzy_match_parallel(
+                "otakotaku",
                 unlinked,
                 records,
                 threshold=90,
@@ -412,7 +586,9 @@ class DataMatcher:
                 Status.INFO,
                 f"Starting fuzzy matching for {len(unlinked)} unlinked items",
             )
-            matches = self._fuzzy_match_parallel(unlinked, records, threshold=95)
+            matches = self._fuzzy_match_parallel(
+                "silveryasha", unlinked, records, threshold=95
+            )
 
             for sy_item, record in matches:
                 record.silveryasha = sy_item["id"]
@@ -469,73 +645,147 @@ class DataMatcher:
                     f"Applied {applied} manual mappings for {platform}",
                 )
 
+    def _get_pool(self, records: List[AnimeRecord]) -> PoolType:
+        """Get the worker pool, starting it with the AOD title index on first use."""
+        if self.pool is None:
+            if self.title_index is None:
+                self.title_index = TitleBlockingIndex([r.title for r in records])
+
+            self.pool = Pool(
+                processes=cpu_count(),
+                initializer=_init_fuzzy_worker,
+                initargs=(self.title_index,),
+            )
+        return self.pool
+
+    def _reset_fuzzy_state(self) -> None:
+        """Drop the title index and match cache of a previous run."""
+        self.title_index = None
+        self.match_cache = None
+
+    def _close_pool(self) -> None:
+        """Shut down the worker pool if one was started."""
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+
+    def close(self) -> None:
+        """Shut down the worker pool."""
+        self._close_pool()
+
+    def __enter__(self):
+        """Context manager entry."""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit."""
+        self.close()
+
     def _fuzzy_match_parallel(
         self,
+        platform: str,
         unlinked_items: List[Dict],
         records: List[AnimeRecord],
         threshold: int = 85,
         title_preprocessor=None,
     ) -> List[Tuple[Dict, AnimeRecord]]:
-        """Parallelized fuzzy matching using multiprocessing."""
-        # Convert records to minimal dicts for multiprocessing (only title needed)
-        record_dicts = [{"title": r.title} for r in records]
-
-        # Prepare arguments
-        args_list = [
-            (item, record_dicts, threshold, title_preprocessor)
-            for item in unlinked_items
-        ]
-
-        # Use multiprocessing
-        num_processes = cpu_count()
-        matches = []
+        """Parallelized fuzzy matching using batched score matrices."""
+        titles = []
+        for item in unlinked_items:
+            title = item.get("title", "")
+            if title_preprocessor:
+                title = title_preprocessor(title)
+            titles.append(title)
+
+        # Reuse matches from previous runs, only score titles never seen before
+        if self.match_cache is None:
+            self.match_cache = FuzzyMatchCache(
+                self.cache_dir, corpus_fingerprint([r.title for r in records])
+            )
+        cached = self.match_cache.get_matches(platform, threshold)
+        results: Dict[str, MatchEntry] = {
+            title: cached[title] for title in titles if title in cached
+        }
+        pending = sorted(
+            {title for title in titles if title not in results}, key=normalize_title
+        )
 
-        with Pool(processes=num_processes) as pool:
-            results = pool.map(self._fuzzy_match_single, args_list)
+        if results:
+            pprint.print(
+                Platform.SYSTEM,
+                Status.INFO,
+                f"Reused {len(results)} cached {platform} matches, scoring {len(pending)} new titles",
+            )
 
-            # Convert back to record objects
-            for result in results:
-                if result:
-                    item, record_dict = result
-                    # Find the actual record object
-                    for record in records:
-                        if record.title == record_dict["title"]:
-                            matches.append((item, record))
-                            break
+        if pending:
+            # Batch similar titles together so they share most of their
+            # candidates; tasks only carry titles, workers hold the corpus
+            args_list = [
+                (pending[i : i + FUZZY_BATCH_SIZE], threshold)
+                for i in range(0, len(pending), FUZZY_BATCH_SIZE)
+            ]
+            try:
+                for batch in self._get_pool(records).map(
+                    DataMatcher._fuzzy_match_batch, args_list
+                ):
+                    results.update(batch)
+            finally:
+                # Outside enhance_records the pool only serves this call
+                if not self.share_pool:
+                    self._close_pool()
+
+        self.match_cache.set_matches(platform, threshold, results)
+
+        # Workers return corpus positions, which line up with records
+        matches = []
+        for item, title in zip(unlinked_items, titles):
+            match = results.get(title)
+            if match:
+                matches.append((item, records[match[0]]))
 
         return matches
 
-    def _fuzzy_match_single(self, args: Tuple) -> Optional[Tuple[Dict, Dict]]:
-        """Match a single item against records using fuzzy matching."""
-        item, record_dicts, threshold, title_preprocessor = args
-
-        title = item.get("title", "")
-        if title_preprocessor:
-            title = title_preprocessor(title)
-
-        best_match = None
-        best_ratio = threshold - 1
-
-        for record_dict in record_dicts:
-            record_title = record_dict["title"]
+    @staticmethod
+    def _fuzzy_match_batch(args: Tuple) -> Dict[str, MatchEntry]:
+        """Match a batch of titles against their shared candidate titles at once."""
+        titles, threshold = args
+        title_index = _worker_title_index
+        if not titles or title_index is None:
+            return {}
 
-            # Quick exact match
-            if title == record_title:
-                return (item, record_dict)
-
-            # Fuzzy match
-            ratio = fuzz.ratio(title, record_title)
-            if ratio > best_ratio:
-                best_ratio = ratio
-                best_match = record_dict
-
-                # Early termination for high scores
-                if ratio >= 95:
-                    break
+        columns = sorted(
+            set().union(*(title_index.candidates(t, threshold) for t in titles))
+        )
+        if not columns:
+            return {title: None for title in titles}
+        choices = [title_index.titles[c] for c in columns]
+
+        # Full titles x candidates matrix of fuzz.ratio scores, rounded like
+        # fuzzywuzzy did; scores that cannot round up to the threshold are 0
+        scores = np.rint(
+            cdist(
+                titles,
+                choices,
+                scorer=fuzz.ratio,
+                dtype=np.float64,
+                score_cutoff=threshold - 0.5,
+                workers=1,
+            )
+        )
 
-        if best_match and best_ratio >= threshold:
-            return (item, best_match)
-        return None
+        # Candidates are in corpus order: the first early-accept score wins
+        # (an exact match scores 100), otherwise the first best score does
+        early = scores >= FUZZY_EARLY_ACCEPT
+        best = np.where(early.any(axis=1), early.argmax(axis=1), scores.argmax(axis=1))
+        best_scores = scores[np.arange(len(titles)), best]
+
+        return {
+            title: (columns[best[row]], float(best_scores[row]))
+            if best_scores[row] >= threshold
+            else None
+            for row, title in enumerate(titles)
+        }
 
     def _otakotaku_title_preprocessor(self, title: str) -> str:
         """Preprocess Otak Otaku titles for better matching."""
@@ -6,16 +6,69 @@ Database operations using SQLAlchemy ORM with PostgreSQL.
 Implements bulk operations and proper transaction handling.
 """
 
-from typing import List, Dict, Tuple
-from sqlalchemy import create_engine, Engine, select, update, delete, func, insert
+import io
+from operator import attrgetter
+from typing import Any, Iterable, Iterator, List, Dict, Optional, Tuple
+from sqlalchemy import (
+    Engine,
+    Integer,
+    select,
+    update,
+    delete,
+    func,
+    insert,
+    text,
+)
 from sqlalchemy.orm import Session, sessionmaker
-from dataclasses import asdict
+from sqlalchemy.util import await_only
 
+from generator.database import create_database_engine
 from generator.models import Base, Anime, ChangeLog, ManualMapping
-from generator.anime_record import AnimeRecord
-from generator.const import DATABASE_URL, pprint
+from generator.anime_record import AnimeRecord, XXH3_PREFIX, hash_algorithm_of
+from generator.const import COPY_FORMAT, DATABASE_URL, RECORD_HASH_ALGORITHM, pprint
+from generator.pg_copy import BinaryCopyStream, Encoder, encode_int4, encode_text
 from generator.prettyprint import Platform, Status
 
+ANIME_COLUMNS = [
+    col.name
+    for col in Anime.__table__.columns
+    if col.name not in ("id", "created_at", "updated_at")
+]
+"""Anime columns written from AnimeRecord fields of the same name"""
+
+# Split as attrgetter is only typed for at least one explicit name
+_get_anime_values = attrgetter(ANIME_COLUMNS[0], *ANIME_COLUMNS[1:])
+
+# Binary COPY encoders of anime and staging table columns
+_COPY_ENCODERS: Dict[str, Encoder] = {
+    col.name: encode_int4 if isinstance(col.type, Integer) else encode_text
+    for col in Anime.__table__.columns
+}
+_COPY_ENCODERS.update(row_num=encode_int4, previous_hash=encode_text)
+
+
+def record_pairs(rows: Iterable[Tuple]) -> List[Tuple[int, AnimeRecord]]:
+    """Build (id, AnimeRecord) pairs from (id, *ANIME_COLUMNS) rows."""
+    pairs = []
+    for row in rows:
+        values = dict(zip(ANIME_COLUMNS, row[1:]))
+        pairs.append((row[0], AnimeRecord(title=values.pop("title"), **values)))
+    return pairs
+
+
+def _copy_value(value: Any) -> str:
+    """Render a value for COPY text format, empty meaning NULL."""
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return (
+            value.replace("\\", "\\\\")
+            .replace("\t", "\\t")
+            .replace("\n", "\\n")
+            .replace("\r", "\\r")
+        )
+    return str(value)
+
 
 class ChangeSet:
     """Represents a set of changes to be applied to the database."""
@@ -24,38 +77,24 @@ class ChangeSet:
         self.inserts: List[AnimeRecord] = []
         self.updates: List[Tuple[int, AnimeRecord]] = []  # (anime_id, record)
         self.deletes: List[int] = []  # anime_ids to delete
+        # (anime_id, data_hash) of unchanged records hashed by another algorithm
+        self.rehashes: List[Tuple[int, str]] = []
 
     def total_changes(self) -> int:
         """Get total number of changes."""
         return len(self.inserts) + len(self.updates) + len(self.deletes)
 
 
-class SQLAlchemyOperations:
-    """High-performance database operations using SQLAlchemy ORM with PostgreSQL."""
-
-    def __init__(self, db_path: str = DATABASE_URL):
-        """Initialize with database path."""
-        self.db_path = db_path
-        self.engine = self._create_engine()
-        self.Session = sessionmaker(bind=self.engine)
-        self._create_tables()
-
-    def _create_engine(self) -> Engine:
-        """Create SQLAlchemy engine with PostgreSQL."""
-        return create_engine(
-            self.db_path,
-            echo=False,  # Set to True for SQL debugging
-            pool_pre_ping=True,
-            pool_recycle=3600,  # Recycle connections every hour
-            pool_size=10,  # Connection pool size
-            max_overflow=20,  # Maximum overflow connections
-        )
+class BulkOperations:
+    """Change detection and bulk writes on a given session.
 
-    def _create_tables(self) -> None:
-        """Create all database tables."""
-        Base.metadata.create_all(self.engine)
+    Shared by SQLAlchemyOperations and AsyncSQLAlchemyOperations, the latter
+    running them on its async connection through AsyncSession.run_sync.
+    """
 
-    def detect_changes(self, new_records: List[AnimeRecord]) -> ChangeSet:
+    def _detect_changes(
+        self, session: Session, new_records: List[AnimeRecord]
+    ) -> ChangeSet:
         """Detect changes between new records and existing database."""
         pprint.print(
             Platform.SYSTEM, Status.INFO, "Detecting changes in anime records..."
@@ -63,71 +102,87 @@ class SQLAlchemyOperations:
 
         changeset = ChangeSet()
 
-        with self.Session() as session:
-            # Get existing records from database
-            existing_records = session.execute(
-                select(Anime.id, Anime.title, Anime.myanimelist, Anime.data_hash)
-            ).all()
-
-            existing_by_mal = {
-                r.myanimelist: r for r in existing_records if r.myanimelist
-            }
-            existing_by_title = {r.title: r for r in existing_records}
-
-            # Track processed records
-            processed_mal_ids = set()
-            processed_titles = set()
-
-            # Process new records
-            for record in new_records:
-                # Compute hash for change detection
-                record.data_hash = record.compute_hash()
+        # Get existing records from database
+        existing_records = session.execute(
+            select(Anime.id, Anime.title, Anime.myanimelist, Anime.data_hash)
+        ).all()
+
+        existing_by_mal = {r.myanimelist: r for r in existing_records if r.myanimelist}
+        existing_by_title = {r.title: r for r in existing_records}
+
+        # Track processed records
+        processed_mal_ids = set()
+        processed_titles = set()
+
+        # Process new records
+        for record in new_records:
+            # Compute hash for change detection
+            record.data_hash = record.compute_hash(RECORD_HASH_ALGORITHM)
+
+            existing_record = None
+
+            # Try to find existing record by MAL ID first
+            if record.myanimelist and record.myanimelist in existing_by_mal:
+                existing_record = existing_by_mal[record.myanimelist]
+                processed_mal_ids.add(record.myanimelist)
+            # Then try by title
+            elif record.title in existing_by_title:
+                existing_record = existing_by_title[record.title]
+                processed_titles.add(record.title)
+
+            if existing_record:
+                # Check if record has changed
+                if existing_record.data_hash != record.data_hash:
+                    # Hashes stored by another algorithm are compared in
+                    # that algorithm, unchanged records are only rehashed
+                    stored_algorithm = hash_algorithm_of(existing_record.data_hash)
+                    if (
+                        stored_algorithm
+                        and stored_algorithm != RECORD_HASH_ALGORITHM
+                        and existing_record.data_hash
+                        == record.compute_hash(stored_algorithm)
+                    ):
+                        changeset.rehashes.append(
+                            (existing_record.id, record.data_hash)
+                        )
+                    else:
+                        changeset.updates.append((existing_record.id, record))
+            else:
+                # New record
+                changeset.inserts.append(record)
+                if record.myanimelist:
+                    processed_mal_ids.add(record.myanimelist)
+                processed_titles.add(record.title)
 
-                existing_record = None
+        # Find records to delete (existed before but not in new data)
+        for existing_record in existing_records:
+            should_delete = False
 
-                # Try to find existing record by MAL ID first
-                if record.myanimelist and record.myanimelist in existing_by_mal:
-                    existing_record = existing_by_mal[record.myanimelist]
-                    processed_mal_ids.add(record.myanimelist)
-                # Then try by title
-                elif record.title in existing_by_title:
-                    existing_record = existing_by_title[record.title]
-                    processed_titles.add(record.title)
-
-                if existing_record:
-                    # Check if record has changed
-                    if existing_record.data_hash != record.data_hash:
-                        changeset.updates.append((existing_record.id, record))
-                else:
-                    # New record
-                    changeset.inserts.append(record)
-                    if record.myanimelist:
-                        processed_mal_ids.add(record.myanimelist)
-                    processed_titles.add(record.title)
-
-            # Find records to delete (existed before but not in new data)
-            for existing_record in existing_records:
-                should_delete = False
-
-                if existing_record.myanimelist:
-                    if existing_record.myanimelist not in processed_mal_ids:
-                        should_delete = True
-                elif existing_record.title not in processed_titles:
+            if existing_record.myanimelist:
+                if existing_record.myanimelist not in processed_mal_ids:
                     should_delete = True
+            elif existing_record.title not in processed_titles:
+                should_delete = True
 
-                if should_delete:
-                    changeset.deletes.append(existing_record.id)
+            if should_delete:
+                changeset.deletes.append(existing_record.id)
 
         pprint.print(
             Platform.SYSTEM,
             Status.INFO,
             f"Changes detected: {len(changeset.inserts)} inserts, {len(changeset.updates)} updates, {len(changeset.deletes)} deletes",
         )
+        if changeset.rehashes:
+            pprint.print(
+                Platform.SYSTEM,
+                Status.INFO,
+                f"Migrating {len(changeset.rehashes)} stored hashes to {RECORD_HASH_ALGORITHM}",
+            )
         return changeset
 
-    def apply_changes(self, changeset: ChangeSet) -> None:
+    def _apply_changes(self, session: Session, changeset: ChangeSet) -> None:
         """Apply changes to the database using efficient bulk operations."""
-        if changeset.total_changes() == 0:
+        if changeset.total_changes() == 0 and not changeset.rehashes:
             pprint.print(Platform.SYSTEM, Status.INFO, "No changes to apply")
             return
 
@@ -137,232 +192,203 @@ class SQLAlchemyOperations:
             f"Applying {changeset.total_changes()} changes to database...",
         )
 
-        with self.Session() as session:
-            try:
-                # Apply bulk inserts
-                if changeset.inserts:
-                    anime_ids = self._bulk_insert_anime_records(
-                        session, changeset.inserts
-                    )
-                    self._bulk_log_changes(session, anime_ids, "insert")
-
-                # Apply bulk updates
-                if changeset.updates:
-                    self._bulk_update_anime_records(session, changeset.updates)
-                    anime_ids = [anime_id for anime_id, _ in changeset.updates]
-                    self._bulk_log_changes(session, anime_ids, "update")
-
-                # Apply bulk deletes
-                if changeset.deletes:
-                    self._bulk_delete_anime_records(session, changeset.deletes)
-                    self._bulk_log_changes(session, changeset.deletes, "delete")
-
-                # Commit all changes
-                session.commit()
-                pprint.print(
-                    Platform.SYSTEM, Status.PASS, "Changes applied successfully"
-                )
-
-            except Exception as e:
-                session.rollback()
-                pprint.print(
-                    Platform.SYSTEM, Status.FAIL, f"Failed to apply changes: {e}"
-                )
-                raise
-
-    def _bulk_insert_anime_records(
-        self, session: Session, records: List[AnimeRecord]
-    ) -> List[int]:
-        """Insert multiple anime records using PostgreSQL COPY FROM for maximum performance."""
-        if not records:
-            return []
-
-        # Use COPY FROM for maximum performance - no batching needed
-        return self._copy_from_insert(session, records)
+        try:
+            # Apply bulk inserts
+            if changeset.inserts:
+                # Change log entries are written by the insert itself
+                self._bulk_insert_anime_records(session, changeset.inserts)
+
+            # Apply bulk updates
+            if changeset.updates:
+                self._bulk_update_anime_records(session, changeset.updates)
+                anime_ids = [anime_id for anime_id, _ in changeset.updates]
+                self._bulk_log_changes(session, anime_ids, "update")
+
+            # Apply bulk deletes
+            if changeset.deletes:
+                self._bulk_delete_anime_records(session, changeset.deletes)
+                self._bulk_log_changes(session, changeset.deletes, "delete")
+
+            # Rewrite migrated hashes, the data itself is unchanged so
+            # nothing is logged for KV ingestion
+            if changeset.rehashes:
+                self._bulk_rehash_anime_records(session, changeset.rehashes)
+
+            # Commit all changes
+            session.commit()
+            pprint.print(Platform.SYSTEM, Status.PASS, "Changes applied successfully")
 
-    def _copy_from_insert(
-        self, session: Session, records: List[AnimeRecord]
-    ) -> List[int]:
-        """Use PostgreSQL COPY FROM for ultra-fast bulk insert."""
-        import io
-        from generator.models import Anime
-
-        # Get all column names from the Anime model, excluding auto-generated columns
-        anime_columns = [
-            col.name
-            for col in Anime.__table__.columns
-            if col.name not in ("id", "created_at", "updated_at")
-        ]
+        except Exception as e:
+            session.rollback()
+            pprint.print(Platform.SYSTEM, Status.FAIL, f"Failed to apply changes: {e}")
+            raise
+
+    def _copy_rows(
+        self,
+        session: Session,
+        table: str,
+        columns: List[str],
+        rows: Iterable[Tuple],
+    ) -> None:
+        """COPY rows into a table on the session's connection.
 
-        # Convert records to clean dicts and collect unique identifiers for ID lookup
-        record_dicts = []
-        unique_identifiers = []  # (title, myanimelist) pairs for ID lookup
-
-        for record in records:
-            record_dict = asdict(record)
-            # Remove None values and ensure all values are proper Python types
-            clean_dict = {}
-            for col_name in anime_columns:
-                value = record_dict.get(col_name)
-                if value is not None:
-                    # Ensure the value is a proper Python type
-                    if hasattr(value, "__dict__") and not isinstance(
-                        value, (str, int, float, bool, list, dict)
-                    ):
-                        continue
-                    clean_dict[col_name] = value
-                else:
-                    clean_dict[col_name] = None
-
-            record_dicts.append(clean_dict)
-            # Store unique identifiers for ID lookup (title is required, myanimelist is optional)
-            unique_identifiers.append(
-                (record.title, getattr(record, "myanimelist", None))
+        Uses COPY_FORMAT: "text" builds a TSV buffer, "binary" streams the
+        rows as they are encoded. asyncpg connections always COPY in binary
+        with their own encoder.
+        """
+        raw_conn = session.connection().connection
+        driver_conn = raw_conn.driver_connection
+        if session.get_bind().dialect.driver == "asyncpg" and driver_conn is not None:
+            await_only(
+                driver_conn.copy_records_to_table(table, records=rows, columns=columns)
             )
+            return
 
-        # Create TSV data in memory
-        tsv_data = io.StringIO()
-
-        # Write data rows (no header for COPY FROM)
-        for record_dict in record_dicts:
-            row_values = []
-            for col_name in anime_columns:
-                value = record_dict[col_name]
-                if value is None:
-                    row_values.append("")  # Empty string for NULL
-                elif isinstance(value, str):
-                    # Escape tabs and newlines in strings
-                    escaped = (
-                        value.replace("\t", "\\t")
-                        .replace("\n", "\\n")
-                        .replace("\r", "\\r")
-                    )
-                    row_values.append(escaped)
-                else:
-                    row_values.append(str(value))
-            tsv_data.write("\t".join(row_values) + "\n")
-
-        tsv_data.seek(0)
+        if COPY_FORMAT == "binary":
+            data = BinaryCopyStream(rows, [_COPY_ENCODERS[col] for col in columns])
+            options = "FORMAT binary"
+        else:
+            data = io.StringIO()
+            for row in rows:
+                data.write("\t".join(map(_copy_value, row)))
+                data.write("\n")
+            data.seek(0)
+            options = "FORMAT text, DELIMITER E'\\t', NULL ''"
 
-        # Use raw psycopg2 connection for COPY FROM
-        raw_conn = session.connection().connection
         cursor = raw_conn.cursor()
         try:
             cursor.copy_expert(
-                f"COPY anime ({','.join(anime_columns)}) FROM STDIN WITH (FORMAT text, DELIMITER E'\\t', NULL '')",
-                tsv_data,
+                f"COPY {table} ({','.join(columns)}) FROM STDIN WITH ({options})",
+                data,
             )
         finally:
             cursor.close()
 
-        pprint.print(
-            Platform.SYSTEM,
-            Status.INFO,
-            f"Bulk inserted {len(records)} records using COPY FROM",
-        )
-
-        # Get inserted IDs by querying using unique identifiers
-        return self._get_inserted_ids(session, unique_identifiers)
-
-    def _get_inserted_ids(
-        self, session: Session, unique_identifiers: List[Tuple[str, str]]
-    ) -> List[int]:
-        """Get IDs of inserted records using unique identifiers."""
-        # Build a query to get IDs for all inserted records
-        # We'll use title and myanimelist as unique identifiers
-
-        anime_ids = []
-
-        # Process in batches to avoid huge IN clauses
-        BATCH_SIZE = 1000
-        for i in range(0, len(unique_identifiers), BATCH_SIZE):
-            batch = unique_identifiers[i : i + BATCH_SIZE]
-
-            # Separate records with and without myanimelist IDs
-            mal_records = [
-                (title, mal_id) for title, mal_id in batch if mal_id is not None
-            ]
-            title_only_records = [title for title, mal_id in batch if mal_id is None]
-
-            batch_ids = []
-
-            # Query records that have myanimelist IDs (more reliable)
-            if mal_records:
-                mal_ids = [mal_id for _, mal_id in mal_records]
-                result = session.execute(
-                    select(Anime.id).where(Anime.myanimelist.in_(mal_ids))
-                )
-                batch_ids.extend([row[0] for row in result])
-
-            # Query records without myanimelist IDs (use title)
-            if title_only_records:
-                result = session.execute(
-                    select(Anime.id).where(Anime.title.in_(title_only_records))
-                )
-                batch_ids.extend([row[0] for row in result])
+    def _bulk_insert_anime_records(
+        self, session: Session, records: List[AnimeRecord]
+    ) -> int:
+        """Insert anime records and log them, using COPY into a temp table.
 
-            anime_ids.extend(batch_ids)
+        The rows are moved into anime with INSERT ... SELECT ... RETURNING,
+        which feeds the change log in the same statement, so exactly the new
+        primary keys are logged without querying them back.
+        """
+        if not records:
+            return 0
 
-            # Log progress for large batches
-            if len(unique_identifiers) > BATCH_SIZE:
-                pprint.print(
-                    Platform.SYSTEM,
-                    Status.INFO,
-                    f"Retrieved IDs for batch {i // BATCH_SIZE + 1}/{(len(unique_identifiers) + BATCH_SIZE - 1) // BATCH_SIZE}",
+        columns = ", ".join(ANIME_COLUMNS)
+        session.execute(
+            text(
+                f"""
+                CREATE TEMP TABLE anime_inserts ON COMMIT DROP AS
+                SELECT 0 AS row_num, {columns}
+                FROM anime WITH NO DATA
+                """
+            )
+        )
+        self._copy_rows(
+            session,
+            "anime_inserts",
+            ["row_num", *ANIME_COLUMNS],
+            (
+                (row_num, *_get_anime_values(record))
+                for row_num, record in enumerate(records)
+            ),
+        )
+        result = session.connection().execute(
+            text(
+                f"""
+                WITH inserted AS (
+                    INSERT INTO anime ({columns})
+                    SELECT {columns} FROM anime_inserts ORDER BY row_num
+                    RETURNING id
                 )
+                INSERT INTO change_log (anime_id, change_type, processed)
+                SELECT id, 'insert', false FROM inserted
+                """
+            )
+        )
+        inserted = result.rowcount
+        session.execute(text("DROP TABLE anime_inserts"))
 
         pprint.print(
             Platform.SYSTEM,
             Status.INFO,
-            f"Retrieved {len(anime_ids)} IDs for inserted records",
+            f"Bulk inserted {inserted} records using COPY FROM",
         )
-
-        return anime_ids
+        return inserted
 
     def _bulk_update_anime_records(
         self, session: Session, updates: List[Tuple[int, AnimeRecord]]
     ) -> None:
-        """Update multiple anime records using PostgreSQL bulk operations."""
+        """Update multiple anime records using COPY into a temp table."""
         if not updates:
             return
 
-        # PostgreSQL can handle much larger batches
-        BATCH_SIZE = 1000
+        session.execute(
+            text(
+                f"""
+                CREATE TEMP TABLE anime_updates ON COMMIT DROP AS
+                SELECT 0 AS row_num, id, {", ".join(ANIME_COLUMNS)}
+                FROM anime WITH NO DATA
+                """
+            )
+        )
+        self._copy_rows(
+            session,
+            "anime_updates",
+            ["row_num", "id", *ANIME_COLUMNS],
+            (
+                (row_num, anime_id, *_get_anime_values(record))
+                for row_num, (anime_id, record) in enumerate(updates)
+            ),
+        )
 
-        # Process updates in batches
-        for i in range(0, len(updates), BATCH_SIZE):
-            batch = updates[i : i + BATCH_SIZE]
-
-            # Prepare update data with primary keys
-            update_values = []
-            for anime_id, record in batch:
-                record_dict = asdict(record)
-                record_dict["id"] = anime_id  # Include the primary key for bulk update
-                # Remove None values and ensure all values are proper Python types
-                clean_dict = {}
-                for k, v in record_dict.items():
-                    if v is not None:
-                        # Ensure the value is a proper Python type, not a SQLAlchemy object
-                        if hasattr(v, "__dict__") and not isinstance(
-                            v, (str, int, float, bool, list, dict)
-                        ):
-                            # Skip complex objects that can't be serialized
-                            continue
-                        clean_dict[k] = v
-                update_values.append(clean_dict)
-
-            if update_values:
-                # Use PostgreSQL-specific bulk update with VALUES clause
-                stmt = update(Anime)
-                session.execute(stmt, update_values)
+        # Last update wins when an anime row was matched more than once
+        assignments = ", ".join(f"{col} = u.{col}" for col in ANIME_COLUMNS)
+        result = session.connection().execute(
+            text(
+                f"""
+                UPDATE anime a SET {assignments}, updated_at = now()
+                FROM (
+                    SELECT DISTINCT ON (id) * FROM anime_updates
+                    ORDER BY id, row_num DESC
+                ) u
+                WHERE a.id = u.id
+                """
+            )
+        )
+        session.execute(text("DROP TABLE anime_updates"))
 
-            # Log progress for large batches
-            if len(updates) > BATCH_SIZE:
-                pprint.print(
-                    Platform.SYSTEM,
-                    Status.INFO,
-                    f"Updated batch {i // BATCH_SIZE + 1}/{(len(updates) + BATCH_SIZE - 1) // BATCH_SIZE}",
-                )
+        pprint.print(
+            Platform.SYSTEM,
+            Status.INFO,
+            f"Bulk updated {result.rowcount} records using COPY FROM",
+        )
+
+    def _bulk_rehash_anime_records(
+        self, session: Session, rehashes: List[Tuple[int, str]]
+    ) -> None:
+        """Rewrite the stored data_hash of unchanged anime records."""
+        session.execute(
+            text(
+                """
+                CREATE TEMP TABLE anime_rehashes (id integer, data_hash text)
+                ON COMMIT DROP
+                """
+            )
+        )
+        self._copy_rows(session, "anime_rehashes", ["id", "data_hash"], rehashes)
+        session.execute(
+            text(
+                """
+                UPDATE anime a SET data_hash = r.data_hash
+                FROM anime_rehashes r
+                WHERE a.id = r.id
+                """
+            )
+        )
+        session.execute(text("DROP TABLE anime_rehashes"))
 
     def _bulk_delete_anime_records(
         self, session: Session, anime_ids: List[int]
@@ -421,6 +447,242 @@ class SQLAlchemyOperations:
                     f"Logged {change_type} changes batch {i // BATCH_SIZE + 1}/{(len(anime_ids) + BATCH_SIZE - 1) // BATCH_SIZE}",
                 )
 
+
+class SQLAlchemyOperations(BulkOperations):
+    """High-performance database operations using SQLAlchemy ORM with PostgreSQL."""
+
+    def __init__(self, db_path: str = DATABASE_URL, engine: Optional[Engine] = None):
+        """Initialize with database path, or a shared engine.
+
+        Tables are only created for a private engine, the owner of a shared
+        engine initializes the schema through SQLAlchemySchema.
+        """
+        self.db_path = db_path
+        self._owns_engine = engine is None
+        self.engine = engine if engine is not None else create_database_engine(db_path)
+        self.Session = sessionmaker(bind=self.engine)
+        if self._owns_engine:
+            self._create_tables()
+
+    def _create_tables(self) -> None:
+        """Create all database tables."""
+        Base.metadata.create_all(self.engine)
+
+    def detect_changes(self, new_records: List[AnimeRecord]) -> ChangeSet:
+        """Detect changes between new records and existing database."""
+        with self.Session() as session:
+            return self._detect_changes(session, new_records)
+
+    def merge_records(self, new_records: List[AnimeRecord]) -> Dict[str, int]:
+        """Detect and apply changes inside the database.
+
+        Server-side counterpart of detect_changes followed by apply_changes.
+        Records are COPYed with their hashes into a temporary (unlogged)
+        staging table, matched by myanimelist then title with the same rules
+        as detect_changes, and applied with set-based statements that also
+        write the change log. Everything runs in one transaction and only
+        the counts come back.
+        """
+        pprint.print(
+            Platform.SYSTEM, Status.INFO, "Detecting changes in the database..."
+        )
+
+        columns = ", ".join(ANIME_COLUMNS)
+        staged_columns = ", ".join(f"s.{col}" for col in ANIME_COLUMNS)
+        assignments = ", ".join(f"{col} = c.{col}" for col in ANIME_COLUMNS)
+
+        with self.Session() as session:
+            try:
+                # Hashes stored by another algorithm are compared against a
+                # second hash of each record, see detect_changes
+                migrate_from = self._get_stale_hash_algorithm(session)
+
+                session.execute(
+                    text(
+                        f"""
+                        CREATE TEMP TABLE anime_staging ON COMMIT DROP AS
+                        SELECT 0 AS row_num, {columns}, data_hash AS previous_hash
+                        FROM anime WITH NO DATA
+                        """
+                    )
+                )
+                self._copy_rows(
+                    session,
+                    "anime_staging",
+                    ["row_num", *ANIME_COLUMNS, "previous_hash"],
+                    self._staging_rows(new_records, migrate_from),
+                )
+                session.execute(text("ANALYZE anime_staging"))
+
+                # Match each staged row to the latest anime row with its MAL ID,
+                # falling back to its title
+                session.execute(
+                    text(
+                        """
+                        CREATE TEMP TABLE anime_match ON COMMIT DROP AS
+                        WITH by_mal AS (
+                            SELECT DISTINCT ON (myanimelist) myanimelist, id
+                            FROM anime
+                            WHERE myanimelist <> 0
+                            ORDER BY myanimelist, id DESC
+                        ), by_title AS (
+                            SELECT DISTINCT ON (title) title, id
+                            FROM anime
+                            ORDER BY title, id DESC
+                        )
+                        SELECT
+                            s.row_num,
+                            s.myanimelist,
+                            s.title,
+                            COALESCE(m.id, t.id) AS anime_id,
+                            m.id IS NOT NULL AS mal_match
+                        FROM anime_staging s
+                        LEFT JOIN by_mal m
+                            ON s.myanimelist <> 0 AND m.myanimelist = s.myanimelist
+                        LEFT JOIN by_title t
+                            ON m.id IS NULL AND t.title = s.title
+                        """
+                    )
+                )
+
+                # Counts come from rowcount, which only Connection.execute
+                # is typed to return; it runs in the session's transaction
+                conn = session.connection()
+
+                # Existing rows whose MAL ID (or title, without one) was not
+                # matched or inserted are gone from the source data
+                deleted = conn.execute(
+                    text(
+                        """
+                        WITH deleted AS (
+                            DELETE FROM anime
+                            WHERE id IN (
+                                SELECT a.id FROM anime a
+                                WHERE a.myanimelist <> 0 AND NOT EXISTS (
+                                    SELECT 1 FROM anime_match m
+                                    WHERE m.myanimelist = a.myanimelist
+                                    AND (m.mal_match OR m.anime_id IS NULL)
+                                )
+                                UNION ALL
+                                SELECT a.id FROM anime a
+                                WHERE COALESCE(a.myanimelist, 0) = 0 AND NOT EXISTS (
+                                    SELECT 1 FROM anime_match m
+                                    WHERE m.title = a.title AND NOT m.mal_match
+                                )
+                            )
+                            RETURNING id
+                        )
+                        INSERT INTO change_log (anime_id, change_type, processed)
+                        SELECT id, 'delete', false FROM deleted
+                        """
+                    )
+                ).rowcount
+
+                # Last staged row wins when several match the same anime row
+                changed = """
+                    SELECT DISTINCT ON (m.anime_id) m.anime_id, s.*
+                    FROM anime_match m
+                    JOIN anime_staging s USING (row_num)
+                    WHERE m.anime_id IS NOT NULL
+                    ORDER BY m.anime_id, m.row_num DESC
+                """
+                rehashed = conn.execute(
+                    text(
+                        f"""
+                        UPDATE anime a SET data_hash = c.data_hash
+                        FROM ({changed}) c
+                        WHERE a.id = c.anime_id
+                        AND a.data_hash = c.previous_hash
+                        AND a.data_hash <> c.data_hash
+                        """
+                    )
+                ).rowcount
+                updated = conn.execute(
+                    text(
+                        f"""
+                        WITH updated AS (
+                            UPDATE anime a SET {assignments}, updated_at = now()
+                            FROM ({changed}) c
+                            WHERE a.id = c.anime_id
+                            AND a.data_hash IS DISTINCT FROM c.data_hash
+                            AND a.data_hash IS DISTINCT FROM c.previous_hash
+                            RETURNING a.id
+                        )
+                        INSERT INTO change_log (anime_id, change_type, processed)
+                        SELECT id, 'update', false FROM updated
+                        """
+                    )
+                ).rowcount
+
+                inserted = conn.execute(
+                    text(
+                        f"""
+                        WITH inserted AS (
+                            INSERT INTO anime ({columns})
+                            SELECT {staged_columns}
+                            FROM anime_staging s
+                            JOIN anime_match m USING (row_num)
+                            WHERE m.anime_id IS NULL
+                            ORDER BY s.row_num
+                            RETURNING id
+                        )
+                        INSERT INTO change_log (anime_id, change_type, processed)
+                        SELECT id, 'insert', false FROM inserted
+                        """
+                    )
+                ).rowcount
+
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                pprint.print(
+                    Platform.SYSTEM, Status.FAIL, f"Failed to merge records: {e}"
+                )
+                raise
+
+        counts = {
+            "inserted": inserted,
+            "updated": updated,
+            "deleted": deleted,
+            "rehashed": rehashed,
+        }
+        pprint.print(
+            Platform.SYSTEM,
+            Status.PASS,
+            f"Changes applied: {inserted} inserts, {updated} updates, {deleted} deletes",
+        )
+        if rehashed:
+            pprint.print(
+                Platform.SYSTEM,
+                Status.INFO,
+                f"Migrated {rehashed} stored hashes to {RECORD_HASH_ALGORITHM}",
+            )
+        return counts
+
+    def _get_stale_hash_algorithm(self, session: Session) -> Optional[str]:
+        """Get the algorithm of stored hashes not using the configured one."""
+        xxh3_hashes = Anime.data_hash.startswith(XXH3_PREFIX, autoescape=True)
+        stale = ~xxh3_hashes if RECORD_HASH_ALGORITHM == "xxh3" else xxh3_hashes
+        data_hash = session.execute(
+            select(Anime.data_hash).where(stale).limit(1)
+        ).scalar()
+        return hash_algorithm_of(data_hash)
+
+    @staticmethod
+    def _staging_rows(
+        records: List[AnimeRecord], migrate_from: Optional[str]
+    ) -> Iterable[Tuple]:
+        """Yield (row_num, *anime columns, previous_hash) for each record."""
+        for row_num, record in enumerate(records):
+            record.data_hash = record.compute_hash(RECORD_HASH_ALGORITHM)
+            previous_hash = record.compute_hash(migrate_from) if migrate_from else None
+            yield (row_num, *_get_anime_values(record), previous_hash)
+
+    def apply_changes(self, changeset: ChangeSet) -> None:
+        """Apply changes to the database using efficient bulk operations."""
+        with self.Session() as session:
+            self._apply_changes(session, changeset)
+
     def get_manual_mappings(self, platform: str) -> Dict[str, str]:
         """Get manual mappings for a platform."""
         with self.Session() as session:
@@ -448,19 +710,114 @@ class SQLAlchemyOperations:
         with self.Session() as session:
             result = session.execute(
                 select(ChangeLog)
-                .where(ChangeLog.processed.is_(False))
+                .where(~ChangeLog.processed)
                 .order_by(ChangeLog.created_at)
             )
             changes = result.scalars().all()
 
             return list(changes)
 
-    def get_all_anime_records(self) -> List[Anime]:
-        """Get all anime records from the database."""
+    def iter_anime_records(
+        self, chunk_size: int = 5000
+    ) -> Iterator[List[Tuple[int, AnimeRecord]]]:
+        """Stream all anime records in chunks of (id, AnimeRecord).
+
+        Reads plain column tuples through a named server-side cursor, so
+        memory stays flat regardless of table size.
+        """
+        columns = [Anime.id, *(getattr(Anime, col) for col in ANIME_COLUMNS)]
+        with self.Session() as session:
+            result = session.execute(
+                select(*columns)
+                .order_by(Anime.id)
+                .execution_options(yield_per=chunk_size)
+            )
+            for rows in result.partitions():
+                yield record_pairs(rows)
+
+    def compact_pending_changes(self) -> int:
+        """Coalesce pending changes of each anime into their net effect.
+
+        Only the latest pending entry of an anime is kept, as the KV store
+        is rewritten from the current row either way. An entry whose
+        history starts with an insert stays an insert, and an anime both
+        inserted and deleted since the last ingest needs no KV write at all.
+        Returns the number of entries removed.
+        """
+        with self.Session() as session:
+            result = session.execute(
+                text(
+                    """
+                    WITH pending AS (
+                        SELECT
+                            id,
+                            change_type,
+                            first_value(change_type) OVER history AS first_type,
+                            last_value(change_type) OVER history AS last_type,
+                            row_number() OVER (
+                                PARTITION BY anime_id ORDER BY created_at DESC, id DESC
+                            ) AS newest
+                        FROM change_log
+                        WHERE NOT processed AND anime_id IS NOT NULL
+                        WINDOW history AS (
+                            PARTITION BY anime_id ORDER BY created_at, id
+                            ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING
+                        )
+                    ),
+                    removed AS (
+                        DELETE FROM change_log c
+                        USING pending p
+                        WHERE c.id = p.id
+                          AND (
+                              p.newest > 1
+                              OR (p.first_type = 'insert' AND p.last_type = 'delete')
+                          )
+                        RETURNING c.id
+                    ),
+                    retyped AS (
+                        UPDATE change_log c
+                        SET change_type = 'insert'
+                        FROM pending p
+                        WHERE c.id = p.id
+                          AND p.newest = 1
+                          AND p.first_type = 'insert'
+                          AND p.last_type = 'update'
+                    )
+                    SELECT count(*) FROM removed
+                    """
+                )
+            )
+            removed = result.scalar_one()
+            session.commit()
+
+        if removed:
+            pprint.print(
+                Platform.SYSTEM,
+                Status.INFO,
+                f"Coalesced {removed} superseded pending changes",
+            )
+        return removed
+
+    def prune_processed_changes(self, retention_days: int) -> int:
+        """Delete processed change log entries older than the retention window."""
         with self.Session() as session:
-            result = session.execute(select(Anime))
-            records = result.scalars().all()
-            return list(records)
+            result = session.connection().execute(
+                delete(ChangeLog).where(
+                    ChangeLog.processed,
+                    ChangeLog.processed_at
+                    < func.now() - func.make_interval(0, 0, 0, retention_days),
+                )
+            )
+            pruned = result.rowcount
+            session.commit()
+
+        if pruned:
+            pprint.print(
+                Platform.SYSTEM,
+                Status.INFO,
+                f"Pruned {pruned} processed changes older than {retention_days} days",
+            )
+        return pruned
 
     def mark_changes_processed(self, change_ids: List[int]) -> None:
         """Mark change log entries as processed."""
@@ -481,28 +838,40 @@ class SQLAlchemyOperations:
                 session.execute(stmt)
             session.commit()
 
-    def get_platform_count(self, platform: str) -> int:
-        """Get count of non-null entries for a specific platform."""
-        try:
-            with self.Session() as session:
-                # Get the column by name
-                column = getattr(Anime, platform, None)
-                if column is None:
-                    return 0
-
-                # Count non-null entries
-                result = session.execute(
-                    select(func.count(column)).filter(column.is_not(None))
-                )
-                count = result.scalar()
-                return count or 0
+    def get_platform_counts(self, platforms: List[str]) -> Dict[str, int]:
+        """Get non-null entry counts of platforms and the total, in one scan."""
+        counts = [
+            func.count().filter(getattr(Anime, platform).is_not(None)).label(platform)
+            for platform in platforms
+        ]
+        with self.Session() as session:
+            row = session.execute(
+                select(*counts, func.count().label("total")).select_from(Anime)
+            ).one()
+            return dict(row._mapping)
 
-        except Exception as e:
-            pprint.print(
-                Platform.SYSTEM, Status.WARN, f"Error counting {platform}: {e}"
-            )
-            return 0
+    def get_anime_snapshot(self) -> Dict[str, Any]:
+        """Get the row count, highest ID and latest update of the anime table.
+
+        Inserts raise the highest ID, deletes lower the count and updates
+        move updated_at, so an unchanged snapshot means unchanged counts.
+        """
+        with self.Session() as session:
+            row = session.execute(
+                select(
+                    func.count().label("total"),
+                    func.max(Anime.id).label("max_id"),
+                    func.max(Anime.updated_at).label("updated_at"),
+                )
+            ).one()
+        updated_at = row.updated_at
+        return {
+            "total": row.total,
+            "max_id": row.max_id,
+            "updated_at": updated_at.isoformat() if updated_at else None,
+        }
 
     def close(self) -> None:
         """Close database connection."""
-        self.engine.dispose()
+        if self._owns_engine:
+            self.engine.dispose()
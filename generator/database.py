@@ -0,0 +1,72 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# Copyright 2025 tajoumaru
+
+"""
+Shared PostgreSQL engine factory.
+One engine, and so one connection pool, is created per CLI invocation and
+injected into every pipeline component.
+"""
+
+from typing import Any, Dict
+
+from sqlalchemy import create_engine, make_url, Engine, URL
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine
+from sqlalchemy.pool import NullPool
+
+from generator.const import DATABASE_URL, DB_MAX_OVERFLOW, DB_POOL_SIZE
+
+
+def _pool_options(pool_size: int, max_overflow: int) -> Dict[str, Any]:
+    """Get engine pool arguments, a pool_size of 0 disabling pooling."""
+    if pool_size <= 0:
+        return {"poolclass": NullPool}
+
+    return {
+        "pool_pre_ping": True,
+        "pool_recycle": 3600,  # Recycle connections every hour
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+    }
+
+
+def create_database_engine(
+    db_path: str = DATABASE_URL,
+    pool_size: int = DB_POOL_SIZE,
+    max_overflow: int = DB_MAX_OVERFLOW,
+) -> Engine:
+    """Create SQLAlchemy engine with PostgreSQL.
+
+    A pool_size of 0 opens a fresh connection per checkout, which suits
+    serverless databases fronted by their own pooler.
+    """
+    return create_engine(
+        db_path,
+        echo=False,  # Set to True for SQL debugging
+        **_pool_options(pool_size, max_overflow),
+    )
+
+
+def async_database_url(db_path: str) -> URL:
+    """Get the asyncpg variant of a PostgreSQL URL."""
+    url = make_url(db_path).set(drivername="postgresql+asyncpg")
+
+    # asyncpg takes ssl where libpq takes sslmode, the last one winning
+    if "sslmode" in url.query:
+        sslmode = url.normalized_query["sslmode"][-1]
+        url = url.difference_update_query(["sslmode"]).update_query_dict(
+            {"ssl": sslmode}
+        )
+    return url
+
+
+def create_async_database_engine(
+    db_path: str = DATABASE_URL,
+    pool_size: int = DB_POOL_SIZE,
+    max_overflow: int = DB_MAX_OVERFLOW,
+) -> AsyncEngine:
+    """Create SQLAlchemy asyncio engine with PostgreSQL over asyncpg."""
+    return create_async_engine(
+        async_database_url(db_path),
+        echo=False,  # Set to True for SQL debugging
+        **_pool_options(pool_size, max_overflow),
+    )
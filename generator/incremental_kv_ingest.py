@@ -6,14 +6,64 @@ Incremental KV Store ingestion module - supports both regular Redis and Upstash
 """
 
 import os
-import json
-from typing import Any, Dict, List, Union
-from dataclasses import asdict
-
-from generator.const import pprint
+import re
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from generator.const import (
+    pprint,
+    KV_CODEC,
+    KV_GENERATION_GRACE_SECONDS,
+    KV_LAYOUT,
+    KV_WRITE_CONCURRENCY,
+)
 from generator.prettyprint import Platform, Status
 from generator.models import ChangeLog
 from generator.anime_record import AnimeRecord
+from generator.kv_codec import ValueCodec, build_dictionary, compact_json
+
+GENERATION_KEY = "current_generation"
+"""Key holding the number of the live KV generation, absent for legacy keys"""
+
+DICTIONARY_KEY = "codec_dict"
+"""Key of the deflate dictionary within a generation"""
+
+_GENERATION_PREFIX = re.compile(r"g\d+:")
+
+KV_LAYOUTS = ("keys", "hash")
+"""Supported platform key layouts, keys being the legacy default"""
+
+HASH_BUCKETS = 1024
+"""Hashes per platform in the hash layout, must match api/index.go"""
+
+
+def generation_prefix(generation: int) -> str:
+    """Get the key prefix of a KV generation, generation 0 being unprefixed"""
+    return f"g{generation}:" if generation else ""
+
+
+def mapping_location(key: str) -> Tuple[str, str]:
+    """
+    Get the hash and field holding a platform key in the hash layout
+
+    "trakt/shows/1/seasons/2" is field "shows/1/seasons/2" of hash
+    "trakt:<CRC32 of the field mod HASH_BUCKETS>". Buckets stay well under
+    the 128 entries Redis keeps listpack encoded by default.
+    """
+    platform, field = key.split("/", 1)
+    return f"{platform}:{zlib.crc32(field.encode('utf-8')) % HASH_BUCKETS}", field
+
+
+def changed_anime_ids(changes: List[ChangeLog]) -> List[int]:
+    """Get the IDs of inserted and updated anime, whose records the KV store needs"""
+    return [
+        c.anime_id
+        for c in changes
+        if c.change_type in ("insert", "update") and c.anime_id is not None
+    ]
 
 
 class IncrementalKVIngest:
@@ -21,8 +71,13 @@ class IncrementalKVIngest:
 
     def __init__(self) -> None:
         """Initialize Redis connection - supports both regular Redis and Upstash"""
-        self.client = None
+        if KV_LAYOUT not in KV_LAYOUTS:
+            raise ValueError(f"Unsupported KV layout: {KV_LAYOUT}")
+
+        # upstash_redis and redis-py clients share the commands used here
+        self.client: Any = None
         self.is_upstash = False
+        self.layout = KV_LAYOUT
 
         # Check for Upstash credentials first
         upstash_url = os.getenv("KV_REST_API_URL")
@@ -85,6 +140,144 @@ class IncrementalKVIngest:
             )
             raise
 
+        # Every key is read and written within the live generation
+        self.generation = self._get_current_generation()
+        self.prefix = generation_prefix(self.generation)
+
+        # Upstash commands travel as JSON, so binary values go as base64
+        self.codec = ValueCodec(KV_CODEC, text_only=self.is_upstash)
+        self._load_dictionary()
+
+        # Batches are written concurrently, each over its own pooled
+        # connection (redis-py) or HTTP connection (Upstash)
+        self.write_concurrency = max(KV_WRITE_CONCURRENCY, 1)
+        self.write_stats: Dict[str, Any] = {
+            "operations": 0,
+            "seconds": 0.0,
+            "latencies": [],
+        }
+
+    def _load_dictionary(self) -> None:
+        """Use the deflate dictionary of the live generation, if it has one"""
+        value = self.client.get(self.prefix + DICTIONARY_KEY)
+        if value:
+            self.codec.set_dictionary(self.codec.unwrap(value))
+        elif self.codec.name == "deflate":
+            pprint.print(
+                Platform.SYSTEM,
+                Status.WARN,
+                "No deflate dictionary in the live generation, writing compact JSON until the next full rebuild",
+            )
+
+    def _get_current_generation(self) -> int:
+        """Get the live KV generation, 0 when keys predate generations"""
+        value = self.client.get(GENERATION_KEY)
+        if isinstance(value, bytes):
+            value = value.decode("utf-8")
+        return int(value) if value else 0
+
+    def begin_rebuild(self) -> int:
+        """
+        Start writing a full copy of the data under a new generation
+
+        The live generation keeps serving reads until finish_rebuild flips
+        the generation pointer. Leftovers of an earlier failed rebuild into
+        the same generation are deleted first.
+
+        :return: The new generation
+        """
+        generation = self._get_current_generation() + 1
+        prefix = generation_prefix(generation)
+
+        leftovers = self._scan_keys(f"{prefix}*")
+        for i in range(0, len(leftovers), 10000):
+            self.client.delete(*leftovers[i : i + 10000])
+
+        self.generation = generation
+        self.prefix = prefix
+        # write_records builds a fresh dictionary from the first chunk
+        self.codec.set_dictionary(None)
+        pprint.print(
+            Platform.SYSTEM,
+            Status.INFO,
+            f"Rebuilding KV store into generation {generation}",
+        )
+        return generation
+
+    def finish_rebuild(self, generation: int, expected_records: int) -> None:
+        """
+        Verify a rebuilt generation and make it live
+
+        The previous generation expires after KV_GENERATION_GRACE_SECONDS,
+        so readers still holding the old pointer keep getting answers.
+
+        :param generation: Generation returned by begin_rebuild
+        :param expected_records: Number of anime records written
+        :raises RuntimeError: If the generation is missing records, the live
+            generation is then left untouched
+        """
+        prefix = generation_prefix(generation)
+        # Anime data keys are the numeric ones, platform keys start with a name
+        stored_records = len(self._scan_keys(f"{prefix}[0-9]*"))
+        if stored_records != expected_records:
+            raise RuntimeError(
+                f"Generation {generation} holds {stored_records} anime records, "
+                f"expected {expected_records}"
+            )
+
+        previous = self._get_current_generation()
+        self.client.set(GENERATION_KEY, str(generation))
+        pprint.print(
+            Platform.SYSTEM,
+            Status.PASS,
+            f"KV generation {generation} is live ({stored_records} anime records)",
+        )
+
+        if previous != generation:
+            self._expire_generation(previous)
+
+    def _expire_generation(self, generation: int) -> None:
+        """Set the grace period expiry on every key of a replaced generation"""
+        if generation:
+            keys = self._scan_keys(f"{generation_prefix(generation)}*")
+        else:
+            # Legacy keys have no prefix at all
+            keys = [
+                key
+                for key in self._scan_keys("*")
+                if key != GENERATION_KEY and not _GENERATION_PREFIX.match(key)
+            ]
+
+        for i in range(0, len(keys), 10000):
+            pipeline = self.client.pipeline()
+            for key in keys[i : i + 10000]:
+                pipeline.expire(key, KV_GENERATION_GRACE_SECONDS)
+            self._run_pipeline(pipeline)
+
+        pprint.print(
+            Platform.SYSTEM,
+            Status.INFO,
+            f"Generation {generation} ({len(keys)} keys) expires in {KV_GENERATION_GRACE_SECONDS} seconds",
+        )
+
+    def _run_pipeline(self, pipeline) -> List[Any]:
+        """Run a pipeline, Upstash ones run with exec(), redis-py with execute()"""
+        if self.is_upstash:
+            return pipeline.exec()
+        return pipeline.execute()
+
+    def _scan_keys(self, pattern: str) -> List[str]:
+        """Get all keys matching a pattern with SCAN"""
+        keys: List[str] = []
+        cursor = 0
+        while True:
+            cursor, batch = self.client.scan(cursor, match=pattern, count=10000)
+            keys.extend(
+                key.decode("utf-8") if isinstance(key, bytes) else key for key in batch
+            )
+            if int(cursor) == 0:
+                return keys
+
     def _generate_platform_keys(
         self, record: AnimeRecord, internal_id: int
     ) -> List[str]:
@@ -172,11 +365,26 @@ class IncrementalKVIngest:
             f"Processing {len(changes)} incremental changes to KV store",
         )
 
+        # Fetch inserted and updated anime in bulk
+        records = self._get_anime_data_bulk(db_ops, changed_anime_ids(changes))
+        self.write_changes(changes, records)
+
+    def write_changes(
+        self, changes: List[ChangeLog], records: Dict[int, AnimeRecord]
+    ) -> int:
+        """
+        Write incremental changes to the KV store
+
+        :param changes: ChangeLog entries to write
+        :param records: Current records of the anime changed_anime_ids
+            returns for the changes, by internal ID
+        :return: Number of KV operations executed
+        """
         # Group changes by type for bulk processing
         insert_updates = [c for c in changes if c.change_type in ("insert", "update")]
         deletes = [c for c in changes if c.change_type == "delete"]
 
-        batch_data: Dict[str, Union[str, None]] = {}
+        batch_data: Dict[str, Union[str, bytes, None]] = {}
 
         # Much larger batch sizes for KV operations
         batch_size = 10000 if self.is_upstash else 5000
@@ -186,59 +394,320 @@ class IncrementalKVIngest:
             batch_data[str(change.anime_id)] = None
 
         # Process inserts/updates in bulk
-        if insert_updates:
-            anime_data_bulk = self._get_anime_data_bulk(
-                db_ops, [c.anime_id for c in insert_updates]
-            )
+        for change in insert_updates:
+            anime_id = change.anime_id
+            anime_data = records.get(anime_id)
 
-            for change in insert_updates:
-                anime_id = change.anime_id
-                anime_data = anime_data_bulk.get(anime_id)
+            if anime_id is not None and anime_data:
+                self._add_record_entries(batch_data, anime_id, anime_data)
 
-                if anime_data:
-                    # Generate platform keys
-                    platform_keys = self._generate_platform_keys(anime_data, anime_id)
+        # Drop platform keys the previous version of each anime owned
+        for key in self._get_stale_platform_keys(
+            [c.anime_id for c in changes if c.anime_id is not None],
+            batch_data,
+            batch_size,
+        ):
+            batch_data[key] = None
 
-                    # Add platform key mappings
-                    for key in platform_keys:
-                        batch_data[key] = str(anime_id)
+        if not batch_data:
+            pprint.print(Platform.SYSTEM, Status.INFO, "No KV operations to execute")
+            return 0
 
-                    # Add the complete data
-                    batch_data[str(anime_id)] = json.dumps(asdict(anime_data))
+        processed_count = self._execute_batches(batch_data, batch_size)
 
-        # Execute in large batches
-        processed_count = 0
-        batch_count = 0
-        total_keys = len(batch_data)
-        total_batches = (total_keys + batch_size - 1) // batch_size
+        pprint.print(
+            Platform.SYSTEM,
+            Status.PASS,
+            f"Processed {len(changes)} changes to KV store ({processed_count} operations)",
+        )
+        return processed_count
 
-        if total_keys == 0:
-            pprint.print(Platform.SYSTEM, Status.INFO, "No KV operations to execute")
-            return
+    def write_records(self, records: Iterable[Tuple[int, AnimeRecord]]) -> int:
+        """
+        Write anime records and their platform keys to the KV store
+
+        Used by full rebuilds, which stream the anime table in chunks instead
+        of going through the change log.
 
+        :param records: (internal ID, AnimeRecord) pairs
+        :return: Number of KV operations executed
+        """
+        records = list(records)
+        if self.codec.name == "deflate" and self.codec.dictionary is None and records:
+            self._store_dictionary(
+                build_dictionary([compact_json(record) for _, record in records])
+            )
+
+        batch_data: Dict[str, Union[str, bytes, None]] = {}
+        for anime_id, record in records:
+            self._add_record_entries(batch_data, anime_id, record)
+
+        batch_size = 10000 if self.is_upstash else 5000
+        return self._execute_batches(batch_data, batch_size, verbose=False)
+
+    def _store_dictionary(self, dictionary: bytes) -> None:
+        """Store a deflate dictionary in the current generation and encode with it"""
+        self.client.set(self.prefix + DICTIONARY_KEY, self.codec.wrap(dictionary))
+        self.codec.set_dictionary(dictionary)
         pprint.print(
             Platform.SYSTEM,
             Status.INFO,
-            f"Executing {total_keys} KV operations in {total_batches} batches",
+            f"Stored a {len(dictionary)} byte deflate dictionary",
         )
 
-        batch_items = list(batch_data.items())
-        for i in range(0, total_keys, batch_size):
-            batch_count += 1
-            batch_slice = dict(batch_items[i : i + batch_size])
+    def _add_record_entries(
+        self,
+        batch_data: Dict[str, Union[str, bytes, None]],
+        anime_id: int,
+        record: AnimeRecord,
+    ) -> None:
+        """Add the platform key mappings and data of a record to a batch"""
+        # Add platform key mappings
+        for key in self._generate_platform_keys(record, anime_id):
+            batch_data[key] = str(anime_id)
+
+        # Add the complete data
+        batch_data[str(anime_id)] = self.codec.encode(record)
+
+    def _get_stale_platform_keys(
+        self,
+        anime_ids: List[int],
+        batch_data: Dict[str, Union[str, bytes, None]],
+        batch_size: int,
+    ) -> List[str]:
+        """
+        Get platform keys that changed or deleted anime no longer own
+
+        The stored data of each anime doubles as the manifest of the
+        platform keys written for it, so no extra keys are kept. A key is
+        only stale if this batch does not rewrite it and it still points to
+        the anime, another anime may have taken it over since. Anime whose
+        stored data cannot be decoded fall back to a scan of the keys they
+        own.
+
+        :param anime_ids: Internal IDs of the changed anime
+        :param batch_data: Pending KV operations of the changes
+        :param batch_size: Keys per MGET request
+        :return: Platform keys to delete
+        """
+        owners: Dict[str, str] = {}
+        undecodable: Set[str] = set()
+        stored = self._mget_raw([str(anime_id) for anime_id in anime_ids], batch_size)
+        for anime_id, value in zip(anime_ids, stored):
+            if value is None:
+                continue
+            try:
+                record = self.codec.decode(value)
+            except ValueError as e:
+                pprint.print(
+                    Platform.SYSTEM,
+                    Status.WARN,
+                    f"Cannot decode stored data of anime {anime_id}, looking up its platform keys by owner: {e}",
+                )
+                undecodable.add(str(anime_id))
+                continue
+            for key in self._generate_platform_keys(record, anime_id):
+                if key not in batch_data:
+                    owners[key] = str(anime_id)
+
+        if undecodable:
+            for key, owner in self._get_owned_platform_keys(
+                undecodable, batch_size
+            ).items():
+                if key not in batch_data:
+                    owners[key] = owner
+
+        if not owners:
+            return []
+
+        keys = list(owners)
+        current = self._get_mappings(keys, batch_size)
+        stale = [key for key, value in zip(keys, current) if value == owners[key]]
+
+        if stale:
+            pprint.print(
+                Platform.SYSTEM,
+                Status.INFO,
+                f"Removing {len(stale)} stale platform keys",
+            )
+        return stale
+
+    def _get_owned_platform_keys(
+        self, owners: Set[str], batch_size: int
+    ) -> Dict[str, str]:
+        """
+        Get the platform keys of the live generation mapping to any of owners
+
+        Scans every platform key, so it is only used for anime whose stored
+        data cannot tell which keys were written for them.
+
+        :param owners: Internal IDs as stored in platform keys
+        :param batch_size: Keys per MGET request
+        :return: Owner of each platform key found
+        """
+        owned: Dict[str, str] = {}
+
+        if self.layout == "hash":
+            names = self._scan_keys(f"{self.prefix}*:*")
+        else:
+            names = self._scan_keys(f"{self.prefix}*/*")
+        # Unprefixed patterns also match the keys of other generations
+        if not self.prefix:
+            names = [name for name in names if not _GENERATION_PREFIX.match(name)]
+
+        if self.layout == "hash":
+            for name in names:
+                platform = name[len(self.prefix) :].rsplit(":", 1)[0]
+                for field, value in self.client.hgetall(name).items():
+                    if isinstance(field, bytes):
+                        field = field.decode("utf-8")
+                    if isinstance(value, bytes):
+                        value = value.decode("utf-8")
+                    if value in owners:
+                        owned[f"{platform}/{field}"] = value
+        else:
+            keys = [name[len(self.prefix) :] for name in names]
+            for key, value in zip(keys, self._mget(keys, batch_size)):
+                if value in owners:
+                    owned[key] = value
+
+        return owned
+
+    def _mget(self, keys: List[str], batch_size: int) -> List[Union[str, None]]:
+        """Get the values of keys in the live generation as strings, in batches"""
+        return [
+            value.decode("utf-8") if isinstance(value, bytes) else value
+            for value in self._mget_raw(keys, batch_size)
+        ]
+
+    def _mget_raw(
+        self, keys: List[str], batch_size: int
+    ) -> List[Union[str, bytes, None]]:
+        """Get the values of keys in the live generation as stored, in batches"""
+        values: List[Union[str, bytes, None]] = []
+        for i in range(0, len(keys), batch_size):
+            values.extend(
+                self.client.mget(
+                    *(self.prefix + key for key in keys[i : i + batch_size])
+                )
+            )
+        return values
+
+    def _get_mappings(self, keys: List[str], batch_size: int) -> List[Union[str, None]]:
+        """Get the internal IDs platform keys map to, in batches"""
+        if self.layout != "hash":
+            return self._mget(keys, batch_size)
+
+        values: List[Union[str, None]] = []
+        for i in range(0, len(keys), batch_size):
+            pipeline = self.client.pipeline()
+            for key in keys[i : i + batch_size]:
+                name, field = mapping_location(key)
+                pipeline.hget(self.prefix + name, field)
+            values.extend(
+                value.decode("utf-8") if isinstance(value, bytes) else value
+                for value in self._run_pipeline(pipeline)
+            )
+        return values
+
+    def resolve(self, platform_key: str) -> Optional[AnimeRecord]:
+        """
+        Look up an anime by platform key, like the API does
+
+        Reference resolver for both layouts: the platform key gives the
+        internal ID, whose data key holds the record.
+
+        :param platform_key: Key such as "myanimelist/1"
+        :return: The anime record, None if the key is unknown
+        """
+        internal_id = self._get_mappings([platform_key], 1)[0]
+        if internal_id is None:
+            return None
+        value = self._mget_raw([internal_id], 1)[0]
+        return self.codec.decode(value) if value is not None else None
+
+    def _execute_batches(
+        self,
+        batch_data: Dict[str, Union[str, bytes, None]],
+        batch_size: int,
+        verbose: bool = True,
+    ) -> int:
+        """
+        Execute KV operations in large batches, returning how many ran
 
+        Up to write_concurrency batches are in flight at once. A batch is
+        only sliced off once one of them completes, so a slow store holds
+        back the producer instead of piling batches up in memory.
+        """
+        total_keys = len(batch_data)
+        total_batches = (total_keys + batch_size - 1) // batch_size
+
+        if total_keys == 0:
+            return 0
+
+        if verbose:
             pprint.print(
                 Platform.SYSTEM,
                 Status.INFO,
-                f"Processing KV batch {batch_count}/{total_batches} ({len(batch_slice)} operations)",
+                f"Executing {total_keys} KV operations in {total_batches} batches ({self.write_concurrency} in flight)",
             )
-            self._execute_batch(batch_slice)
-            processed_count += len(batch_slice)
 
+        slots = threading.BoundedSemaphore(self.write_concurrency)
+        latencies: List[float] = self.write_stats["latencies"]
+
+        def run(batch_count: int, batch_slice: Dict[str, Union[str, bytes, None]]):
+            try:
+                batch_start = time.perf_counter()
+                self._execute_batch(batch_slice)
+                latency = time.perf_counter() - batch_start
+                latencies.append(latency)
+                if verbose:
+                    pprint.print(
+                        Platform.SYSTEM,
+                        Status.INFO,
+                        f"KV batch {batch_count}/{total_batches} ({len(batch_slice)} operations) took {latency * 1000:.0f} ms",
+                    )
+            finally:
+                slots.release()
+
+        start = time.perf_counter()
+        batch_items = list(batch_data.items())
+        with ThreadPoolExecutor(max_workers=self.write_concurrency) as executor:
+            futures = []
+            for batch_count, i in enumerate(range(0, total_keys, batch_size), 1):
+                slots.acquire()
+                futures.append(
+                    executor.submit(
+                        run, batch_count, dict(batch_items[i : i + batch_size])
+                    )
+                )
+            for future in futures:
+                future.result()
+
+        self.write_stats["operations"] += total_keys
+        self.write_stats["seconds"] += time.perf_counter() - start
+        if verbose:
+            self.print_write_stats()
+
+        return total_keys
+
+    def print_write_stats(self) -> None:
+        """Log the throughput and batch latencies of all KV writes so far"""
+        latencies = sorted(self.write_stats["latencies"])
+        if not latencies:
+            return
+
+        def percentile(fraction: float) -> float:
+            return latencies[round(fraction * (len(latencies) - 1))] * 1000
+
+        operations = self.write_stats["operations"]
+        seconds = self.write_stats["seconds"]
         pprint.print(
             Platform.SYSTEM,
-            Status.PASS,
-            f"Processed {len(changes)} changes to KV store ({processed_count} operations)",
+            Status.INFO,
+            f"KV writes: {operations} operations in {len(latencies)} batches over {seconds:.2f}s "
+            f"({operations / max(seconds, 1e-9):.0f} ops/s, {self.write_concurrency} in flight), "
+            f"batch latency p50 {percentile(0.5):.0f} ms, p95 {percentile(0.95):.0f} ms, max {latencies[-1] * 1000:.0f} ms",
         )
 
     def _get_anime_data_bulk(
@@ -309,11 +778,26 @@ class IncrementalKVIngest:
             )
             return {}
 
-    def _execute_batch(self, batch_data: Dict[str, Union[str, None]]) -> None:
-        """Execute a batch of KV operations"""
+    def _execute_batch(self, batch_data: Dict[str, Union[str, bytes, None]]) -> None:
+        """Execute a batch of KV operations in the current generation"""
         if not batch_data:
             return
 
+        # Platform keys become fields of their bucket hash in the hash layout
+        hashes: Dict[str, Dict[str, Union[str, bytes, None]]] = {}
+        if self.layout == "hash":
+            strings: Dict[str, Union[str, bytes, None]] = {}
+            for key, value in batch_data.items():
+                if "/" in key:
+                    name, field = mapping_location(key)
+                    hashes.setdefault(self.prefix + name, {})[field] = value
+                else:
+                    strings[key] = value
+            batch_data = strings
+
+        if self.prefix:
+            batch_data = {self.prefix + key: value for key, value in batch_data.items()}
+
         try:
             if self.is_upstash:
                 # Upstash Redis - separate deletes and sets
@@ -324,14 +808,22 @@ class IncrementalKVIngest:
                     self.client.delete(*deletes)
                 if sets:
                     self.client.mset(sets)
+                if hashes:
+                    pipeline = self.client.pipeline()
+                    self._write_hashes(pipeline, hashes)
+                    pipeline.exec()
             else:
-                # Regular Redis - use pipeline for better performance
-                pipeline = self.client.pipeline()
-                for key, value in batch_data.items():
-                    if value is None:
-                        pipeline.delete(key)
-                    else:
-                        pipeline.set(key, value)
+                # Regular Redis - one round trip, with a single DEL and MSET
+                # instead of a command per key to keep client encoding cheap
+                deletes = [k for k, v in batch_data.items() if v is None]
+                sets = {k: v for k, v in batch_data.items() if v is not None}
+
+                pipeline = self.client.pipeline(transaction=False)
+                if deletes:
+                    pipeline.delete(*deletes)
+                if sets:
+                    pipeline.mset(sets)
+                self._write_hashes(pipeline, hashes)
                 pipeline.execute()
 
         except Exception as e:
@@ -345,6 +837,28 @@ class IncrementalKVIngest:
                         self.client.set(key, value)
                 except Exception:
                     pass
+            for name, fields in hashes.items():
+                try:
+                    self._write_hashes(self.client, {name: fields})
+                except Exception:
+                    pass
+
+    def _write_hashes(
+        self, target, hashes: Dict[str, Dict[str, Union[str, bytes, None]]]
+    ) -> None:
+        """Queue field sets and deletes on a pipeline, or run them on the client"""
+        for name, fields in hashes.items():
+            deletes = [f for f, v in fields.items() if v is None]
+            sets = {f: v for f, v in fields.items() if v is not None}
+
+            if deletes:
+                target.hdel(name, *deletes)
+            if sets:
+                # upstash-redis names the field mapping "values"
+                if self.is_upstash:
+                    target.hset(name, values=sets)
+                else:
+                    target.hset(name, mapping=sets)
 
     def get_kv_stats(self) -> Dict[str, Any]:
         """Get KV store statistics"""
@@ -373,6 +887,10 @@ class IncrementalKVIngest:
                 # Regular Redis
                 self.client.flushdb()
 
+            # The generation pointer and dictionary went with the data
+            self.generation = 0
+            self.prefix = ""
+            self.codec.set_dictionary(None)
             pprint.print(Platform.SYSTEM, Status.INFO, "All KV store keys deleted")
         except Exception as e:
             pprint.print(Platform.SYSTEM, Status.ERR, f"Error pruning KV store: {e}")
@@ -0,0 +1,176 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# Copyright 2025 tajoumaru
+
+"""
+Value codecs for anime data in the KV store.
+Every value is tagged with its codec, so readers decode any mix of them.
+"""
+
+import base64
+import json
+import struct
+import zlib
+from typing import Dict, Iterable, List, Optional, Union
+
+from generator.anime_record import AnimeRecord, RECORD_FIELDS
+
+KV_CODECS = ("json", "compact", "deflate")
+"""Supported value codecs, json being the legacy default"""
+
+DEFLATE_TAG = b"\x02"
+"""Header byte of deflate values, followed by the 4-byte dictionary ID"""
+
+TEXT_TAG = "~"
+"""Prefix of base64 wrapped binary values, for stores that only take text"""
+
+DICTIONARY_SIZE = 32768
+"""Size of deflate dictionaries, the full window deflate can reference"""
+
+# JSON values are unprefixed, legacy ones included
+_JSON_TAG = b"{"
+_DICTIONARY_ID = struct.Struct("!I")
+
+
+def compact_json(record: AnimeRecord) -> bytes:
+    """Encode a record as compact JSON without nulls or data_hash."""
+    return json.dumps(
+        {
+            field: value
+            for field, value in record.to_dict().items()
+            if value is not None and field != "data_hash"
+        },
+        separators=(",", ":"),
+        ensure_ascii=False,
+    ).encode("utf-8")
+
+
+def build_dictionary(samples: List[bytes]) -> bytes:
+    """
+    Build a deflate dictionary from sample compact JSON payloads
+
+    Deflate encodes close matches in fewer bits than distant ones, so the
+    dictionary keeps the last DICTIONARY_SIZE bytes of the joined samples.
+    """
+    return b"".join(samples)[-DICTIONARY_SIZE:]
+
+
+def dictionary_id(dictionary: bytes) -> int:
+    """Get the ID deflate values reference a dictionary by, its CRC32."""
+    return zlib.crc32(dictionary)
+
+
+class ValueCodec:
+    """Encodes anime records into KV values and decodes values of any codec."""
+
+    def __init__(self, name: str, text_only: bool = False):
+        if name not in KV_CODECS:
+            raise ValueError(f"Unsupported KV codec: {name}")
+
+        self.name = name
+        self.text_only = text_only
+        self.dictionary: Optional[bytes] = None
+        self._dictionary_id = 0
+        # Every dictionary seen, deflate values name the one they need
+        self._dictionaries: Dict[int, bytes] = {}
+
+    def set_dictionary(self, dictionary: Optional[bytes]) -> None:
+        """Encode deflate values with a dictionary, None to write compact JSON."""
+        self.dictionary = dictionary
+        if dictionary is not None:
+            self._dictionary_id = dictionary_id(dictionary)
+            self._dictionaries[self._dictionary_id] = dictionary
+
+    def encode(self, record: AnimeRecord) -> Union[str, bytes]:
+        """Encode a record as a KV value."""
+        if self.name == "json":
+            return json.dumps(record.to_dict())
+
+        payload = compact_json(record)
+        if self.name == "compact" or self.dictionary is None:
+            return payload.decode("utf-8")
+
+        compressor = zlib.compressobj(
+            zlib.Z_BEST_COMPRESSION, zlib.DEFLATED, -15, zdict=self.dictionary
+        )
+        return self.wrap(
+            DEFLATE_TAG
+            + _DICTIONARY_ID.pack(self._dictionary_id)
+            + compressor.compress(payload)
+            + compressor.flush()
+        )
+
+    def wrap(self, data: bytes) -> Union[str, bytes]:
+        """Base64 wrap binary data when the store only takes text."""
+        if self.text_only:
+            return TEXT_TAG + base64.b64encode(data).decode("ascii")
+        return data
+
+    @staticmethod
+    def unwrap(value: Union[str, bytes]) -> bytes:
+        """Get the raw bytes of a stored value, undoing any base64 wrapping."""
+        if isinstance(value, str):
+            value = value.encode("utf-8")
+        if value[:1] == TEXT_TAG.encode("ascii"):
+            return base64.b64decode(value[1:])
+        return value
+
+    def decode(self, value: Union[str, bytes]) -> AnimeRecord:
+        """
+        Build an AnimeRecord from a KV value of any codec
+
+        :raises ValueError: If a deflate value names an unknown dictionary
+        """
+        value = self.unwrap(value)
+        tag = value[:1]
+
+        if tag == DEFLATE_TAG:
+            (dictionary_id,) = _DICTIONARY_ID.unpack_from(value, 1)
+            dictionary = self._dictionaries.get(dictionary_id)
+            if dictionary is None:
+                raise ValueError(f"Unknown deflate dictionary {dictionary_id:08x}")
+            decompressor = zlib.decompressobj(-15, zdict=dictionary)
+            data = json.loads(
+                decompressor.decompress(value[1 + _DICTIONARY_ID.size :])
+                + decompressor.flush()
+            )
+        elif tag == _JSON_TAG:
+            data = json.loads(value)
+        else:
+            raise ValueError(f"Unknown KV value tag {tag!r}")
+
+        values = {field: data[field] for field in RECORD_FIELDS if field in data}
+        return AnimeRecord(title=values.pop("title"), **values)
+
+
+def codec_size_report(
+    records: Iterable[AnimeRecord], sample_size: int = 5000
+) -> Dict[str, int]:
+    """
+    Get the total bytes of every record encoded with each codec
+
+    The deflate dictionary is built from the first sample_size records, as
+    a full rebuild builds it from its first chunk. Sizes are raw bytes,
+    base64 wrapping for text-only stores adds a third to binary codecs.
+
+    :param records: Records to encode
+    :param sample_size: Records the deflate dictionary is built from
+    :return: Bytes per codec, plus "dictionary" and "records"
+    """
+    records = list(records)
+    codecs = {name: ValueCodec(name) for name in KV_CODECS}
+    dictionary = build_dictionary(
+        [compact_json(record) for record in records[:sample_size]]
+    )
+    codecs["deflate"].set_dictionary(dictionary)
+
+    report = {name: 0 for name in KV_CODECS}
+    for record in records:
+        for name, codec in codecs.items():
+            value = codec.encode(record)
+            report[name] += len(
+                value.encode("utf-8") if isinstance(value, str) else value
+            )
+
+    report["dictionary"] = len(dictionary)
+    report["records"] = len(records)
+    return report
@@ -0,0 +1,215 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# Copyright 2025 tajoumaru
+
+"""
+Persistent caches for the data matcher.
+Remembers fuzzy title matches and per-platform link results so unchanged
+inputs are not matched again on the next run.
+"""
+
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from generator.anime_record import AnimeRecord
+from generator.const import pprint
+from generator.prettyprint import Platform, Status
+
+MATCH_CACHE_FILE = "fuzzy_match_cache.json"
+"""File name of the fuzzy match cache inside the cache directory"""
+
+MATCH_CACHE_VERSION = 1
+"""Bump when the matching algorithm changes to invalidate stored matches"""
+
+LINK_STATE_FILE = "match_state.json"
+"""File name of the per-platform link state inside the cache directory"""
+
+LINK_STATE_VERSION = 1
+"""Bump when a linking phase changes to force a full relink"""
+
+# (record index, score), or None when the title matched nothing
+MatchEntry = Optional[Tuple[int, float]]
+
+# (record index, {field: value}) for every record a linking phase changed
+LinkChange = Tuple[int, Dict[str, Any]]
+
+
+def corpus_fingerprint(titles: List[str]) -> str:
+    """Compute a fingerprint of the AOD title corpus, order included."""
+    hasher = hashlib.sha256()
+    for title in titles:
+        hasher.update(title.encode("utf-8"))
+        hasher.update(b"\0")
+    return hasher.hexdigest()
+
+
+def base_fingerprint(records: List[AnimeRecord]) -> str:
+    """Compute a fingerprint of the AOD base records, every field included.
+
+    Phases read some fields and overwrite others, and the changes they
+    store are relative to the base values, so all of them must match.
+    """
+    hasher = hashlib.sha256()
+    for r in records:
+        hasher.update(r.compute_hash("xxh3").encode("utf-8"))
+    return hasher.hexdigest()
+
+
+def files_fingerprint(cache_dir: str, filenames: Tuple[str, ...]) -> str:
+    """Compute a SHA256 fingerprint over the contents of source files."""
+    hasher = hashlib.sha256()
+    for filename in filenames:
+        hasher.update(f"{filename}\0".encode("utf-8"))
+        filepath = os.path.join(cache_dir, filename)
+        if not os.path.exists(filepath):
+            hasher.update(b"missing\0")
+            continue
+        with open(filepath, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def _load_json(path: str, description: str) -> Optional[Dict]:
+    """Load a JSON cache file, warning and ignoring it when unreadable."""
+    if not os.path.exists(path):
+        return None
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        pprint.print(
+            Platform.SYSTEM, Status.WARN, f"Ignoring unreadable {description}: {e}"
+        )
+        return None
+
+
+def _save_json(path: str, data: Dict, description: str) -> None:
+    """Atomically write a JSON cache file."""
+    try:
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            # json.dumps uses the C encoder, json.dump would not
+            f.write(json.dumps(data, ensure_ascii=False, separators=(",", ":")))
+        os.replace(temp_path, path)
+    except Exception as e:
+        pprint.print(Platform.SYSTEM, Status.WARN, f"Failed to save {description}: {e}")
+
+
+class FuzzyMatchCache:
+    """Fuzzy match results keyed by platform, query title and AOD corpus."""
+
+    def __init__(self, cache_dir: str, fingerprint: str):
+        self.path = os.path.join(cache_dir, MATCH_CACHE_FILE)
+        self.fingerprint = fingerprint
+        self.platforms: Dict[str, Dict] = {}
+        self._load()
+
+    def _load(self) -> None:
+        """Load stored matches, dropping them if the corpus changed."""
+        data = _load_json(self.path, "match cache")
+        if data is None:
+            return
+
+        if (
+            data.get("version") != MATCH_CACHE_VERSION
+            or data.get("corpus") != self.fingerprint
+        ):
+            pprint.print(
+                Platform.SYSTEM,
+                Status.INFO,
+                "AOD titles changed, fuzzy match cache invalidated",
+            )
+            return
+
+        self.platforms = data.get("platforms", {})
+
+    def get_matches(self, platform: str, threshold: int) -> Dict[str, MatchEntry]:
+        """Get stored matches of a platform, empty if its threshold changed."""
+        stored = self.platforms.get(platform)
+        if not stored or stored.get("threshold") != threshold:
+            return {}
+        return {
+            title: tuple(entry) if entry else None
+            for title, entry in stored.get("matches", {}).items()
+        }
+
+    def set_matches(
+        self, platform: str, threshold: int, matches: Dict[str, MatchEntry]
+    ) -> None:
+        """Replace the stored matches of a platform with this run's titles."""
+        self.platforms[platform] = {
+            "threshold": threshold,
+            "matches": {
+                title: list(entry) if entry else None
+                for title, entry in matches.items()
+            },
+        }
+
+    def save(self) -> None:
+        """Write the cache to disk."""
+        data = {
+            "version": MATCH_CACHE_VERSION,
+            "corpus": self.fingerprint,
+            "platforms": self.platforms,
+        }
+        _save_json(self.path, data, "match cache")
+
+
+class LinkState:
+    """Record changes made by each linking phase in the previous run."""
+
+    def __init__(self, cache_dir: str, fingerprint: str):
+        self.path = os.path.join(cache_dir, LINK_STATE_FILE)
+        self.fingerprint = fingerprint
+        self.phases: Dict[str, Dict] = {}
+        self.dirty = False
+        self._load()
+
+    def _load(self) -> None:
+        """Load stored link results, dropping them if the AOD base changed."""
+        data = _load_json(self.path, "link state")
+        if data is None:
+            return
+
+        if (
+            data.get("version") != LINK_STATE_VERSION
+            or data.get("base") != self.fingerprint
+        ):
+            pprint.print(
+                Platform.SYSTEM,
+                Status.INFO,
+                "AOD base data changed, relinking all platforms",
+            )
+            return
+
+        self.phases = data.get("phases", {})
+
+    def get_changes(self, phase: str, source: str) -> Optional[List[LinkChange]]:
+        """Get the stored changes of a phase, None if its source changed."""
+        stored = self.phases.get(phase)
+        if not stored or stored.get("source") != source:
+            return None
+        return [(index, fields) for index, fields in stored.get("changes", [])]
+
+    def set_changes(self, phase: str, source: str, changes: List[LinkChange]) -> None:
+        """Replace the stored changes of a phase."""
+        self.phases[phase] = {
+            "source": source,
+            "changes": [[index, fields] for index, fields in changes],
+        }
+        self.dirty = True
+
+    def save(self) -> None:
+        """Write the link state to disk if any phase was relinked."""
+        if not self.dirty:
+            return
+
+        data = {
+            "version": LINK_STATE_VERSION,
+            "base": self.fingerprint,
+            "phases": self.phases,
+        }
+        _save_json(self.path, data, "link state")
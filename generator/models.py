@@ -7,7 +7,7 @@ Defines ORM models for all database tables.
 """
 
 from typing import Optional
-from sqlalchemy import Integer, Text, Boolean, DateTime
+from sqlalchemy import Index, Integer, Text, Boolean, DateTime, text
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 from sqlalchemy.sql import func
 from datetime import datetime
@@ -25,39 +25,39 @@ class Anime(Base):
     __tablename__ = "anime"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    title: Mapped[str] = mapped_column(Text, nullable=False)
+    title: Mapped[str] = mapped_column(Text, nullable=False, index=True)
 
     # Core platform IDs
-    myanimelist: Mapped[Optional[int]] = mapped_column(Integer)
-    anilist: Mapped[Optional[int]] = mapped_column(Integer)
-    anidb: Mapped[Optional[int]] = mapped_column(Integer)
-    kitsu: Mapped[Optional[int]] = mapped_column(Integer)
+    myanimelist: Mapped[Optional[int]] = mapped_column(Integer, index=True)
+    anilist: Mapped[Optional[int]] = mapped_column(Integer, index=True)
+    anidb: Mapped[Optional[int]] = mapped_column(Integer, index=True)
+    kitsu: Mapped[Optional[int]] = mapped_column(Integer, index=True)
 
     # Additional platform IDs
-    animenewsnetwork: Mapped[Optional[int]] = mapped_column(Integer)
-    animeplanet: Mapped[Optional[str]] = mapped_column(Text)  # Slug, not ID
-    anisearch: Mapped[Optional[int]] = mapped_column(Integer)
-    annict: Mapped[Optional[int]] = mapped_column(Integer)
-    imdb: Mapped[Optional[str]] = mapped_column(Text)
-    livechart: Mapped[Optional[int]] = mapped_column(Integer)
-    notify: Mapped[Optional[str]] = mapped_column(Text)  # Base64 ID
-    otakotaku: Mapped[Optional[int]] = mapped_column(Integer)
-    shikimori: Mapped[Optional[int]] = mapped_column(Integer)
-    shoboi: Mapped[Optional[int]] = mapped_column(Integer)
-    silveryasha: Mapped[Optional[int]] = mapped_column(Integer)
-    simkl: Mapped[Optional[int]] = mapped_column(Integer)
-    themoviedb: Mapped[Optional[int]] = mapped_column(Integer)
+    animenewsnetwork: Mapped[Optional[int]] = mapped_column(Integer, index=True)
+    animeplanet: Mapped[Optional[str]] = mapped_column(Text, index=True)  # Slug, not ID
+    anisearch: Mapped[Optional[int]] = mapped_column(Integer, index=True)
+    annict: Mapped[Optional[int]] = mapped_column(Integer, index=True)
+    imdb: Mapped[Optional[str]] = mapped_column(Text, index=True)
+    livechart: Mapped[Optional[int]] = mapped_column(Integer, index=True)
+    notify: Mapped[Optional[str]] = mapped_column(Text, index=True)  # Base64 ID
+    otakotaku: Mapped[Optional[int]] = mapped_column(Integer, index=True)
+    shikimori: Mapped[Optional[int]] = mapped_column(Integer, index=True)
+    shoboi: Mapped[Optional[int]] = mapped_column(Integer, index=True)
+    silveryasha: Mapped[Optional[int]] = mapped_column(Integer, index=True)
+    simkl: Mapped[Optional[int]] = mapped_column(Integer, index=True)
+    themoviedb: Mapped[Optional[int]] = mapped_column(Integer, index=True)
 
     # Kaize (has both slug and ID)
-    kaize: Mapped[Optional[str]] = mapped_column(Text)
-    kaize_id: Mapped[Optional[int]] = mapped_column(Integer)
+    kaize: Mapped[Optional[str]] = mapped_column(Text, index=True)
+    kaize_id: Mapped[Optional[int]] = mapped_column(Integer, index=True)
 
     # Nautiljon (has both slug and ID)
-    nautiljon: Mapped[Optional[str]] = mapped_column(Text)
-    nautiljon_id: Mapped[Optional[int]] = mapped_column(Integer)
+    nautiljon: Mapped[Optional[str]] = mapped_column(Text, index=True)
+    nautiljon_id: Mapped[Optional[int]] = mapped_column(Integer, index=True)
 
     # Trakt (complex structure)
-    trakt: Mapped[Optional[int]] = mapped_column(Integer)
+    trakt: Mapped[Optional[int]] = mapped_column(Integer, index=True)
     trakt_type: Mapped[Optional[str]] = mapped_column(Text)
     trakt_season: Mapped[Optional[int]] = mapped_column(Integer)
 
@@ -127,6 +127,14 @@ class ChangeLog(Base):
     """Change tracking for KV sync."""
 
     __tablename__ = "change_log"
+    __table_args__ = (
+        # Only unprocessed entries are ever looked up by age
+        Index(
+            "ix_change_log_pending",
+            "created_at",
+            postgresql_where=text("NOT processed"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     anime_id: Mapped[Optional[int]] = mapped_column(
@@ -0,0 +1,80 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# Copyright 2025 tajoumaru
+
+"""
+PostgreSQL binary COPY encoding.
+Streams rows to COPY FROM STDIN in binary format, without text escaping.
+"""
+
+import struct
+import sys
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+
+COPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack("!ii", 0, 0)
+"""Binary COPY signature followed by empty flags and header extension"""
+
+COPY_TRAILER = struct.pack("!h", -1)
+"""Binary COPY end-of-data marker"""
+
+_NULL = struct.pack("!i", -1)
+_INT4 = struct.Struct("!ii")
+_LENGTH = struct.Struct("!i")
+_FIELD_COUNT = struct.Struct("!h")
+
+Encoder = Callable[[Any], bytes]
+
+
+def encode_int4(value: Any) -> bytes:
+    """Encode an integer as a length-prefixed int4 field."""
+    return _INT4.pack(4, int(value))
+
+
+def encode_text(value: Any) -> bytes:
+    """Encode a value as a length-prefixed UTF-8 text field."""
+    data = str(value).encode("utf-8")
+    return _LENGTH.pack(len(data)) + data
+
+
+def encode_rows(rows: Iterable[Tuple], encoders: List[Encoder]) -> Iterator[bytes]:
+    """Yield the binary COPY tuples of rows, without header or trailer."""
+    field_count = _FIELD_COUNT.pack(len(encoders))
+    for row in rows:
+        yield field_count + b"".join(
+            [
+                _NULL if value is None else encode(value)
+                for encode, value in zip(encoders, row)
+            ]
+        )
+
+
+class BinaryCopyStream:
+    """File-like reader feeding a binary COPY from a row generator.
+
+    Rows are encoded as the COPY reads them, so only about one read's worth
+    of encoded data is held in memory at a time.
+    """
+
+    def __init__(self, rows: Iterable[Tuple], encoders: List[Encoder]):
+        self.rows = 0
+        self._tuples = encode_rows(rows, encoders)
+        self._buffer = bytearray(COPY_HEADER)
+        self._done = False
+
+    def read(self, size: Optional[int] = -1) -> bytes:
+        """Read up to size bytes of the COPY stream, b"" once exhausted."""
+        if size is None or size < 0:
+            size = sys.maxsize
+
+        while len(self._buffer) < size and not self._done:
+            for data in self._tuples:
+                self._buffer += data
+                self.rows += 1
+                if len(self._buffer) >= size:
+                    break
+            else:
+                self._buffer += COPY_TRAILER
+                self._done = True
+
+        chunk = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return chunk
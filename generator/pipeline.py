@@ -6,37 +6,65 @@ Main SQLAlchemy-based pipeline for anime data processing.
 Replaces the turso-based implementation with SQLAlchemy + libsql for better performance.
 """
 
+import asyncio
 import os
 import sys
 import time
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
 
 # Import dialect to ensure registration
 
-from generator.data_operations import SQLAlchemyOperations
+from generator.anime_record import AnimeRecord
+from generator.async_data_operations import AsyncSQLAlchemyOperations
+from generator.data_operations import ChangeSet, SQLAlchemyOperations
+from generator.database import create_async_database_engine, create_database_engine
 from generator.schema import SQLAlchemySchema
 from generator.cache_downloader import CacheDownloader
 from generator.data_extractor import DataExtractor
-from generator.incremental_kv_ingest import IncrementalKVIngest
+from generator.incremental_kv_ingest import IncrementalKVIngest, changed_anime_ids
+from generator.kv_codec import codec_size_report
+from generator.models import ChangeLog
 from generator.status_updater import StatusUpdater
-from generator.const import pprint, CACHE_DIR, DATABASE_URL
+from generator.const import (
+    pprint,
+    CACHE_DIR,
+    CHANGE_DETECTION_MODE,
+    CHANGE_LOG_RETENTION_DAYS,
+    DATABASE_ASYNC,
+    DATABASE_URL,
+    DB_MAX_OVERFLOW,
+    DB_POOL_SIZE,
+    MATCH_REPLAY,
+)
 from generator.prettyprint import Platform, Status
 
 
 class SQLAlchemyPipeline:
     """SQLAlchemy-based pipeline for anime data processing."""
 
-    def __init__(self, db_path: str, cache_dir: str = CACHE_DIR):
+    def __init__(
+        self,
+        db_path: str,
+        cache_dir: str = CACHE_DIR,
+        pool_size: int = DB_POOL_SIZE,
+        max_overflow: int = DB_MAX_OVERFLOW,
+        replay_links: bool = MATCH_REPLAY,
+    ):
         """Initialize pipeline with database path and cache directory."""
         self.db_path = db_path
         self.cache_dir = cache_dir
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+
+        # One engine and connection pool shared by every component
+        self.engine = create_database_engine(db_path, pool_size, max_overflow)
 
         # Initialize schema
-        self.schema = SQLAlchemySchema(db_path)
-        self.engine = self.schema.init_database()
+        self.schema = SQLAlchemySchema(db_path, engine=self.engine)
+        self.schema.init_database()
 
         # Initialize operations
-        self.operations = SQLAlchemyOperations(db_path)
+        self.operations = SQLAlchemyOperations(db_path, engine=self.engine)
 
         # Initialize other components
         # For now, create a wrapper that provides the necessary interface for CacheDownloader
@@ -154,7 +182,7 @@ class SQLAlchemyPipeline:
 
         db_wrapper = DatabaseWrapper(self.operations)
         self.downloader = CacheDownloader(db_wrapper, cache_dir)
-        self.extractor = DataExtractor(cache_dir)
+        self.extractor = DataExtractor(cache_dir, replay_links)
         self.status_updater = StatusUpdater(self.operations)
         # For now, skip KV ingest as it needs to be updated for SQLAlchemy
         self.kv_ingest = None
@@ -211,11 +239,25 @@ class SQLAlchemyPipeline:
             # Extract data from cache files
             records = self.extractor.extract_anime_data(cache_files)
 
-            # Detect changes
-            changeset = self.operations.detect_changes(records)
-
-            # Apply changes
-            self.operations.apply_changes(changeset)
+            if CHANGE_DETECTION_MODE == "server":
+                # Detect and apply changes inside the database
+                counts = self.operations.merge_records(records)
+                changeset = None
+            else:
+                if DATABASE_ASYNC:
+                    # Detect and apply changes over asyncpg
+                    changeset = asyncio.run(self._apply_records_async(records))
+                else:
+                    # Detect changes
+                    changeset = self.operations.detect_changes(records)
+
+                    # Apply changes
+                    self.operations.apply_changes(changeset)
+                counts = {
+                    "inserted": len(changeset.inserts),
+                    "updated": len(changeset.updates),
+                    "deleted": len(changeset.deletes),
+                }
 
             # Get final record count
             total_records = self.operations.get_anime_count()
@@ -226,9 +268,9 @@ class SQLAlchemyPipeline:
                 "success": True,
                 "time": processing_time,
                 "total_records": total_records,
-                "records_inserted": len(changeset.inserts),
-                "records_updated": len(changeset.updates),
-                "records_deleted": len(changeset.deletes),
+                "records_inserted": counts["inserted"],
+                "records_updated": counts["updated"],
+                "records_deleted": counts["deleted"],
                 "changeset": changeset,
             }
 
@@ -315,41 +357,73 @@ class SQLAlchemyPipeline:
             # Initialize KV ingestion
             kv_ingest = IncrementalKVIngest()
 
+            # Keep the change log bounded
+            self.operations.prune_processed_changes(CHANGE_LOG_RETENTION_DAYS)
+
             if force_overwrite_all:
-                # Force overwrite all: get all anime records and create synthetic changes
+                # Force overwrite all: rebuild every anime record into a new
+                # key generation while the live one keeps serving reads
                 pprint.print(
                     Platform.SYSTEM,
                     Status.INFO,
                     "Force overwrite all: processing all anime records...",
                 )
 
-                # First, clear all existing KV data
-                kv_ingest.prune_all_keys()
+                generation = kv_ingest.begin_rebuild()
 
-                # Get all anime records
-                all_records = self.operations.get_all_anime_records()
-
-                # Create synthetic change log entries for all records
-                from generator.models import ChangeLog
-
-                synthetic_changes = []
-                for record in all_records:
-                    change = ChangeLog(
-                        anime_id=record.id, change_type="insert", processed=False
+                # Stream the anime table straight into KV batch writes
+                if DATABASE_ASYNC:
+                    changes_processed, operations_count = asyncio.run(
+                        self._rebuild_kv_store_async(kv_ingest)
                     )
-                    synthetic_changes.append(change)
+                else:
+                    changes_processed = 0
+                    operations_count = 0
+                    for chunk in self.operations.iter_anime_records():
+                        operations_count += kv_ingest.write_records(chunk)
+                        changes_processed += len(chunk)
+                        pprint.print(
+                            Platform.SYSTEM,
+                            Status.INFO,
+                            f"Wrote {changes_processed} anime records to KV store",
+                        )
 
-                # Process all changes
-                kv_ingest.process_changes(synthetic_changes, self.operations)
+                pprint.print(
+                    Platform.SYSTEM,
+                    Status.PASS,
+                    f"Rebuilt KV store from {changes_processed} records ({operations_count} operations)",
+                )
+                kv_ingest.print_write_stats()
 
-                changes_processed = len(synthetic_changes)
+                # Verify the new generation and flip reads over to it
+                kv_ingest.finish_rebuild(generation, changes_processed)
 
             else:
                 # Normal incremental processing
-                # Get pending changes
-                pending_changes = self.operations.get_pending_changes()
+                # Collapse each anime's pending history into one change
+                self.operations.compact_pending_changes()
+
+                if DATABASE_ASYNC:
+                    # Fetch each chunk of changes while the previous one is
+                    # written to the KV store
+                    changes_processed = asyncio.run(
+                        self._ingest_changes_async(kv_ingest)
+                    )
+                else:
+                    # Get pending changes
+                    pending_changes = self.operations.get_pending_changes()
 
-                if not pending_changes:
+                    if pending_changes:
+                        # Process changes
+                        kv_ingest.process_changes(pending_changes, self.operations)
+
+                        # Mark changes as processed
+                        change_ids = [change.id for change in pending_changes]
+                        self.operations.mark_changes_processed(change_ids)
+
+                    changes_processed = len(pending_changes)
+
+                if not changes_processed:
                     pprint.print(
                         Platform.SYSTEM, Status.INFO, "No pending changes to process"
                     )
@@ -361,15 +435,6 @@ class SQLAlchemyPipeline:
                         "total_keys": 0,
                     }
 
-                # Process changes
-                kv_ingest.process_changes(pending_changes, self.operations)
-
-                # Mark changes as processed
-                change_ids = [change.id for change in pending_changes]
-                self.operations.mark_changes_processed(change_ids)
-
-                changes_processed = len(pending_changes)
-
             # Get KV stats
             kv_stats = kv_ingest.get_kv_stats()
 
@@ -396,6 +461,100 @@ class SQLAlchemyPipeline:
             )
             return {"success": False, "error": str(e), "time": time.time() - start_time}
 
+    def _async_operations(self) -> AsyncSQLAlchemyOperations:
+        """Get async operations on an asyncpg engine sized like the shared one.
+
+        asyncpg needs an engine of its own, created within the running event
+        loop and disposed of by the caller.
+        """
+        engine = create_async_database_engine(
+            self.db_path, self.pool_size, self.max_overflow
+        )
+        return AsyncSQLAlchemyOperations(self.db_path, engine=engine)
+
+    async def _apply_records_async(self, records: List[AnimeRecord]) -> ChangeSet:
+        """Detect and apply changes of records over asyncpg."""
+        operations = self._async_operations()
+        try:
+            changeset = await operations.detect_changes(records)
+            await operations.apply_changes(changeset)
+        finally:
+            await operations.engine.dispose()
+        return changeset
+
+    async def _ingest_changes_async(
+        self, kv_ingest: IncrementalKVIngest, chunk_size: int = 5000
+    ) -> int:
+        """Write pending changes to the KV store over asyncpg.
+
+        The records of the next chunk of changes are fetched from PostgreSQL
+        while the previous chunk is written to the KV store in a worker
+        thread. Each chunk is marked processed once it is written.
+        Returns the number of changes processed.
+        """
+        operations = self._async_operations()
+        writing: Optional[asyncio.Future] = None
+
+        async def write(chunk: List[ChangeLog], records: Dict[int, AnimeRecord]):
+            await asyncio.to_thread(kv_ingest.write_changes, chunk, records)
+            await operations.mark_changes_processed([change.id for change in chunk])
+
+        try:
+            pending_changes = await operations.get_pending_changes()
+            for i in range(0, len(pending_changes), chunk_size):
+                chunk = pending_changes[i : i + chunk_size]
+                records = await operations.get_anime_records(changed_anime_ids(chunk))
+                if writing is not None:
+                    await writing
+                writing = asyncio.ensure_future(write(chunk, records))
+                pprint.print(
+                    Platform.SYSTEM,
+                    Status.INFO,
+                    f"Writing {i + len(chunk)}/{len(pending_changes)} changes to KV store",
+                )
+
+            if writing is not None:
+                await writing
+        finally:
+            await operations.engine.dispose()
+
+        return len(pending_changes)
+
+    async def _rebuild_kv_store_async(
+        self, kv_ingest: IncrementalKVIngest
+    ) -> Tuple[int, int]:
+        """Stream the anime table into the KV store over asyncpg.
+
+        The next chunk is fetched from PostgreSQL while the previous one is
+        written to the KV store in a worker thread.
+        Returns the number of records and KV operations written.
+        """
+        operations = self._async_operations()
+        records_written = 0
+        operations_count = 0
+        writing: Optional[asyncio.Future] = None
+
+        try:
+            async for chunk in operations.iter_anime_records():
+                if writing is not None:
+                    operations_count += await writing
+                writing = asyncio.ensure_future(
+                    asyncio.to_thread(kv_ingest.write_records, chunk)
+                )
+                records_written += len(chunk)
+                pprint.print(
+                    Platform.SYSTEM,
+                    Status.INFO,
+                    f"Writing {records_written} anime records to KV store",
+                )
+
+            if writing is not None:
+                operations_count += await writing
+        finally:
+            await operations.engine.dispose()
+
+        return records_written, operations_count
+
     def run_full_pipeline(self) -> Dict[str, Any]:
         """Run the complete pipeline."""
         pprint.print(Platform.SYSTEM, Status.INFO, "Starting full pipeline...")
@@ -418,7 +577,16 @@ class SQLAlchemyPipeline:
 
         # Update status.json file
         try:
-            self.status_updater.update_status_file()
+            self.status_updater.update_status_file(
+                data_changed=any(
+                    processing_result[key]
+                    for key in (
+                        "records_inserted",
+                        "records_updated",
+                        "records_deleted",
+                    )
+                )
+            )
         except Exception as e:
             pprint.print(
                 Platform.SYSTEM, Status.WARN, f"Failed to update status file: {e}"
@@ -474,6 +642,14 @@ class SQLAlchemyPipeline:
                 "error": str(e),
             }
 
+    def get_codec_report(self) -> Dict[str, int]:
+        """Get the KV bytes every anime record takes with each value codec."""
+        return codec_size_report(
+            record
+            for chunk in self.operations.iter_anime_records()
+            for _, record in chunk
+        )
+
     def prune_database(self) -> None:
         """Prune (clear) the entire database."""
         pprint.print(Platform.SYSTEM, Status.INFO, "Pruning database...")
@@ -504,6 +680,7 @@ class SQLAlchemyPipeline:
         """Close database connections."""
         self.operations.close()
         self.schema.close()
+        self.engine.dispose()
 
     def __enter__(self):
         """Context manager entry."""
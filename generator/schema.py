@@ -6,33 +6,71 @@ Database schema initialization using SQLAlchemy with PostgreSQL.
 Handles database creation, table management, and migrations.
 """
 
-from sqlalchemy import create_engine, Engine, text
+from typing import Dict, List, Optional
+
+from sqlalchemy import Engine, text
 from sqlalchemy.orm import Session, sessionmaker
 
+from generator.database import create_database_engine
 from generator.models import Base, SchemaVersion
-from generator.const import DATABASE_URL
+from generator.const import DATABASE_URL, pprint
+from generator.prettyprint import Platform, Status
+
+INDEXED_ANIME_COLUMNS = (
+    "title",
+    "myanimelist",
+    "anilist",
+    "anidb",
+    "kitsu",
+    "animenewsnetwork",
+    "animeplanet",
+    "anisearch",
+    "annict",
+    "imdb",
+    "livechart",
+    "notify",
+    "otakotaku",
+    "shikimori",
+    "shoboi",
+    "silveryasha",
+    "simkl",
+    "themoviedb",
+    "kaize",
+    "kaize_id",
+    "nautiljon",
+    "nautiljon_id",
+    "trakt",
+)
+"""Anime columns records are matched and looked up by"""
+
+MIGRATIONS: Dict[int, List[str]] = {
+    # Initial schema, tables come from create_all
+    1: [],
+    2: [],
+    # Lookup indexes, also declared on the models for fresh databases
+    3: [
+        *(
+            f"CREATE INDEX IF NOT EXISTS ix_anime_{column} ON anime ({column})"
+            for column in INDEXED_ANIME_COLUMNS
+        ),
+        "CREATE INDEX IF NOT EXISTS ix_change_log_pending "
+        "ON change_log (created_at) WHERE NOT processed",
+    ],
+}
+"""SQL statements of each schema version, applied in order"""
 
 
 class SQLAlchemySchema:
     """Manages database schema using SQLAlchemy with PostgreSQL."""
 
-    def __init__(self, db_path: str = DATABASE_URL):
-        """Initialize with database path."""
+    def __init__(self, db_path: str = DATABASE_URL, engine: Optional[Engine] = None):
+        """Initialize with database path, or a shared engine."""
         self.db_path = db_path
-        self.engine = self._create_engine()
+        # A shared engine is disposed by its owner, not by close()
+        self._owns_engine = engine is None
+        self.engine = engine if engine is not None else create_database_engine(db_path)
         self.Session = sessionmaker(bind=self.engine)
 
-    def _create_engine(self) -> Engine:
-        """Create SQLAlchemy engine with PostgreSQL."""
-        return create_engine(
-            self.db_path,
-            echo=False,  # Set to True for SQL debugging
-            pool_pre_ping=True,
-            pool_recycle=3600,  # Recycle connections every hour
-            pool_size=10,
-            max_overflow=20,
-        )
-
     def init_database(self) -> Engine:
         """Initialize database and create tables if needed."""
         # Create all tables
@@ -49,19 +87,22 @@ class SQLAlchemySchema:
             # Get current version
             current_version = self._get_current_version(session)
 
-            # Apply migrations based on current version
-            if current_version < 1:
-                # Initial schema version
-                session.add(SchemaVersion(version=1))
-                session.commit()
-                current_version = 1
+            # Apply each newer version in its own transaction
+            for version in sorted(MIGRATIONS):
+                if version <= current_version:
+                    continue
 
-            if current_version < 2:
-                # Add any future migrations here
-                # For now, just mark as version 2
-                session.add(SchemaVersion(version=2))
+                for statement in MIGRATIONS[version]:
+                    session.execute(text(statement))
+                session.add(SchemaVersion(version=version))
                 session.commit()
 
+                pprint.print(
+                    Platform.SYSTEM,
+                    Status.INFO,
+                    f"Applied schema migration {version}",
+                )
+
     def _get_current_version(self, session: Session) -> int:
         """Get current schema version."""
         try:
@@ -131,7 +172,8 @@ class SQLAlchemySchema:
 
     def close(self) -> None:
         """Close database connection."""
-        self.engine.dispose()
+        if self._owns_engine:
+            self.engine.dispose()
 
 
 def init_database(db_path: str = DATABASE_URL) -> Engine:
@@ -147,7 +189,5 @@ def create_tables(engine: Engine) -> None:
 
 def migrate_schema(engine: Engine) -> None:
     """Apply schema migrations."""
-    # Create a temporary schema to handle migrations
-    schema = SQLAlchemySchema()
-    schema.engine = engine
+    schema = SQLAlchemySchema(engine=engine)
     schema.migrate_schema()
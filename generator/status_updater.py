@@ -9,28 +9,65 @@ Updates api/status.json with current statistics and metadata.
 import json
 import os
 from datetime import datetime
-from typing import Dict
+from typing import Any, Dict, Optional
 
 from generator.const import attribution, pprint
 from generator.prettyprint import Platform, Status
 
 
+PLATFORMS = [
+    "anidb",
+    "anilist",
+    "animenewsnetwork",
+    "animeplanet",
+    "anisearch",
+    "annict",
+    "imdb",
+    "kaize",
+    "kitsu",
+    "livechart",
+    "myanimelist",
+    "nautiljon",
+    "notify",
+    "otakotaku",
+    "shikimori",
+    "shoboi",
+    "silveryasha",
+    "simkl",
+    "themoviedb",
+    "trakt",
+]
+"""Platforms counted in status.json"""
+
+STATUS_PATHS = ["api/status.json", "status.json"]
+"""Possible status.json locations, in order of preference"""
+
+
 class StatusUpdater:
     """Updates the API status file with current statistics."""
 
     def __init__(self, operations):
         self.operations = operations
 
-    def update_status_file(self) -> None:
-        """Update api/status.json with current statistics."""
+    def update_status_file(self, data_changed: bool = True) -> None:
+        """Update api/status.json with current statistics.
+
+        The counts are stored with a snapshot of the anime table. When no
+        anime record changed since the last run and the snapshot still
+        matches the table, the stored counts are reused instead of running
+        the aggregate query.
+        """
         pprint.print(Platform.SYSTEM, Status.INFO, "Updating status.json file...")
 
         try:
-            # Get platform counts from database
-            platform_counts = self._get_platform_counts()
-
-            # Calculate total records
-            total_records = self.operations.get_anime_count()
+            # Taken before counting, so a concurrent write fails the next match
+            snapshot = self._get_snapshot()
+            platform_counts = None
+            if not data_changed and snapshot is not None:
+                platform_counts = self._load_stored_counts(snapshot)
+            if platform_counts is None:
+                # Get platform counts and total from database
+                platform_counts = self._get_platform_counts()
 
             # Get current timestamp
             now = datetime.now()
@@ -43,12 +80,10 @@ class StatusUpdater:
             }
             status_data["contributors"] = ["nattadasu", "tajoumaru"]
             status_data["counts"] = platform_counts
-            status_data["counts"]["total"] = total_records
+            status_data["snapshot"] = snapshot
 
             # Write to both possible API locations
-            api_paths = ["api/status.json", "status.json"]
-
-            for path in api_paths:
+            for path in STATUS_PATHS:
                 try:
                     # Create directory if it doesn't exist
                     os.makedirs(os.path.dirname(path), exist_ok=True)
@@ -79,45 +114,56 @@ class StatusUpdater:
                 Platform.SYSTEM, Status.FAIL, f"Failed to update status file: {e}"
             )
 
-    def _get_platform_counts(self) -> Dict[str, int]:
-        """Get count of non-null entries for each platform."""
-        platform_counts = {}
-
-        # Define all platforms that should be counted
-        platforms = [
-            "anidb",
-            "anilist",
-            "animenewsnetwork",
-            "animeplanet",
-            "anisearch",
-            "annict",
-            "imdb",
-            "kaize",
-            "kitsu",
-            "livechart",
-            "myanimelist",
-            "nautiljon",
-            "notify",
-            "otakotaku",
-            "shikimori",
-            "shoboi",
-            "silveryasha",
-            "simkl",
-            "themoviedb",
-            "trakt",
-        ]
+    def _get_snapshot(self) -> Optional[Dict[str, Any]]:
+        """Get the snapshot of the anime table, None if it cannot be read."""
+        try:
+            return self.operations.get_anime_snapshot()
+        except Exception as e:
+            pprint.print(
+                Platform.SYSTEM, Status.WARN, f"Error getting anime snapshot: {e}"
+            )
+            return None
+
+    def _load_stored_counts(self, snapshot: Dict[str, Any]) -> Optional[Dict[str, int]]:
+        """Get the counts of the current status.json, None if unusable.
+
+        Counts are only usable when stored with the same table snapshot.
+        """
+        for path in STATUS_PATHS:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    status_data = json.load(f)
+            except (OSError, ValueError):
+                continue
+
+            if not isinstance(status_data, dict):
+                continue
+            counts = status_data.get("counts")
+            if (
+                status_data.get("snapshot") == snapshot
+                and isinstance(counts, dict)
+                and all(key in counts for key in [*PLATFORMS, "total"])
+            ):
+                pprint.print(
+                    Platform.SYSTEM,
+                    Status.INFO,
+                    f"No record changes, reusing counts from {path}",
+                )
+                return counts
+
+        return None
 
+    def _get_platform_counts(self) -> Dict[str, int]:
+        """Get count of non-null entries for each platform and the total."""
         try:
-            # Get counts from database
-            for platform in platforms:
-                count = self.operations.get_platform_count(platform)
-                platform_counts[platform] = count
+            # Get all counts from database in a single pass
+            return self.operations.get_platform_counts(PLATFORMS)
 
         except Exception as e:
             pprint.print(
                 Platform.SYSTEM, Status.WARN, f"Error getting platform counts: {e}"
             )
             # Return zero counts if there's an error
-            platform_counts = {platform: 0 for platform in platforms}
-
-        return platform_counts
+            platform_counts = {platform: 0 for platform in PLATFORMS}
+            platform_counts["total"] = self.operations.get_anime_count()
+            return platform_counts
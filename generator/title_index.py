@@ -0,0 +1,107 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# Copyright 2025 tajoumaru
+
+"""
+Candidate blocking index for fuzzy title matching.
+Narrows the AOD title corpus down to plausible candidates before scoring.
+"""
+
+import heapq
+import re
+from collections import Counter, defaultdict
+from itertools import chain
+
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def normalize_title(title: str) -> str:
+    """Lowercase a title and collapse punctuation into single spaces."""
+    return _NON_WORD.sub(" ", title.lower()).strip()
+
+
+def length_bounds(length: int, threshold: int) -> tuple[int, int]:
+    """Get the range of title lengths that can still reach the threshold.
+
+    fuzz.ratio is 200 * matches / (len_a + len_b), so a pair whose lengths
+    are too far apart can never score at or above the threshold.
+    """
+    # fuzz.ratio rounds its score, so anything from threshold - 0.5 counts
+    cutoff = max(threshold - 0.5, 1.0)
+    low = int(length * cutoff / (200 - cutoff))
+    high = int(length * (200 - cutoff) / cutoff) + 1
+    return low, high
+
+
+class TitleBlockingIndex:
+    """Inverted index over titles by normalized tokens, n-grams and lengths."""
+
+    def __init__(
+        self,
+        titles: list[str],
+        ngram_size: int = 3,
+        max_candidates: int = 300,
+        max_posting_ratio: float = 0.05,
+    ):
+        self.titles = titles
+        self.ngram_size = ngram_size
+        self.max_candidates = max_candidates
+        self.lengths = [len(title) for title in titles]
+
+        # First position of every exact title, mirrors the old in-order scan
+        self.exact: dict[str, int] = {}
+        self.length_buckets: dict[int, list[int]] = defaultdict(list)
+        postings: dict[str, list[int]] = defaultdict(list)
+
+        for index, title in enumerate(titles):
+            self.exact.setdefault(title, index)
+            self.length_buckets[len(title)].append(index)
+            for key in self._keys(title):
+                postings[key].append(index)
+
+        # Keys shared by a large slice of the corpus ("the", "season", ...)
+        # carry no signal and dominate lookup time, so drop them
+        max_postings = max(int(len(titles) * max_posting_ratio), 1)
+        self.postings = {
+            key: indexes
+            for key, indexes in postings.items()
+            if len(indexes) <= max_postings
+        }
+
+    def _keys(self, title: str) -> set:
+        """Get the blocking keys (tokens and character n-grams) of a title."""
+        normalized = normalize_title(title)
+        if not normalized:
+            return set()
+
+        keys = {f"t:{token}" for token in normalized.split()}
+        padded = f" {normalized} "
+        size = self.ngram_size
+        keys.update(f"g:{padded[i : i + size]}" for i in range(len(padded) - size + 1))
+        return keys
+
+    def candidates(self, title: str, threshold: int) -> list[int]:
+        """Get candidate positions for a title, in corpus order."""
+        low, high = length_bounds(len(title), threshold)
+        lengths = self.lengths
+
+        keys = [key for key in self._keys(title) if key in self.postings]
+        if keys:
+            hits = Counter(chain.from_iterable(self.postings[key] for key in keys))
+            viable = [index for index in hits if low <= lengths[index] <= high]
+            candidates = set(
+                heapq.nlargest(self.max_candidates, viable, key=hits.__getitem__)
+            )
+        else:
+            # Nothing to block on, fall back to every title of a viable length
+            candidates = set(
+                chain.from_iterable(
+                    self.length_buckets.get(length, ())
+                    for length in range(low, high + 1)
+                )
+            )
+
+        exact = self.exact.get(title)
+        if exact is not None:
+            candidates.add(exact)
+
+        return sorted(candidates)
@@ -0,0 +1,49 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# Copyright 2025 tajoumaru
+
+import os
+
+import pytest
+from sqlalchemy import text
+
+# generator.const requires a database URL at import time
+os.environ.setdefault("DATABASE_URL", "postgresql://localhost/idsmoe")
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL", "")
+"""Scratch PostgreSQL database for tests that need one, emptied by each test"""
+
+TEST_REDIS_URL = os.getenv("TEST_REDIS_URL", "")
+"""Scratch Redis database for KV ingestion tests, flushed by each test"""
+
+
+@pytest.fixture
+def operations():
+    """SQLAlchemyOperations on an empty TEST_DATABASE_URL database."""
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+
+    from generator.data_operations import SQLAlchemyOperations
+
+    ops = SQLAlchemyOperations(TEST_DATABASE_URL)
+    with ops.engine.begin() as conn:
+        conn.execute(text("TRUNCATE anime, change_log RESTART IDENTITY"))
+    yield ops
+    ops.close()
+
+
+@pytest.fixture
+def kv_store(monkeypatch):
+    """Redis client of an empty TEST_REDIS_URL database, used for KV ingestion."""
+    if not TEST_REDIS_URL:
+        pytest.skip("TEST_REDIS_URL is not set")
+
+    import redis
+
+    for name in ("KV_REST_API_URL", "KV_REST_API_TOKEN", "REDIS_DB"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("REDIS_URL", TEST_REDIS_URL)
+
+    client = redis.from_url(TEST_REDIS_URL)
+    client.flushdb()
+    yield client
+    client.close()
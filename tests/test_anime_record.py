@@ -0,0 +1,41 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# Copyright 2025 tajoumaru
+
+from dataclasses import replace
+
+from generator.anime_record import AnimeRecord
+
+
+def uncached_hash(record: AnimeRecord, algorithm: str) -> str:
+    return replace(record).compute_hash(algorithm)
+
+
+def test_compute_hash_memo_tracks_values_with_equal_hash():
+    # hash(-1) == hash(-2) in CPython
+    record = AnimeRecord(title="Title", kitsu=-1)
+    record.compute_hash("sha256")
+
+    record.kitsu = -2
+    assert record.compute_hash("sha256") == uncached_hash(record, "sha256")
+
+
+def test_compute_hash_memo_tracks_value_types():
+    record = AnimeRecord(title="Title", anidb=1)
+    record.compute_hash("xxh3")
+
+    record.anidb = True  # type: ignore[assignment]
+    assert record.compute_hash("xxh3") == uncached_hash(record, "xxh3")
+
+
+def test_compute_hash_memo_tracks_algorithm():
+    record = AnimeRecord(title="Title")
+    assert record.compute_hash("sha256") == uncached_hash(record, "sha256")
+    assert record.compute_hash("xxh3") == uncached_hash(record, "xxh3")
+
+
+def test_compute_hash_memo_survives_data_hash_assignment():
+    record = AnimeRecord(title="Title")
+    digest = record.compute_hash("sha256")
+
+    record.data_hash = digest
+    assert record._digest == digest
@@ -0,0 +1,31 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# Copyright 2025 tajoumaru
+
+import io
+import json
+
+import pytest
+
+from generator.data_extractor import iter_json_array
+
+DOCUMENT = {
+    "license": {"name": "ODbL", "url": "https://example.org"},
+    "data": [1.5, -20, 3e-2, 1.5e10, True, None, "title", {"sources": [1, 2]}],
+    "lastUpdate": "2025-01-01",
+}
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 1 << 20])
+def test_iter_json_array_across_chunk_boundaries(chunk_size):
+    stream = io.StringIO(json.dumps(DOCUMENT))
+    assert list(iter_json_array(stream, "data", chunk_size)) == DOCUMENT["data"]
+
+
+def test_iter_json_array_number_split_at_chunk_boundary():
+    stream = io.StringIO('{"data":[1.5]}')
+    assert list(iter_json_array(stream, "data", chunk_size=1)) == [1.5]
+
+
+def test_iter_json_array_empty_array():
+    stream = io.StringIO('{"data": [], "other": 1}')
+    assert list(iter_json_array(stream, "data", chunk_size=2)) == []
@@ -0,0 +1,284 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# Copyright 2025 tajoumaru
+
+import json
+from fractions import Fraction
+
+import pytest
+from rapidfuzz.distance import Indel
+
+from generator.anime_record import AnimeRecord
+from generator.data_matcher import DataMatcher, _init_fuzzy_worker
+from generator.title_index import TitleBlockingIndex
+
+QUERY = ("Shingeki no Kyojin " * 11)[:200]
+
+
+def variant(matched: int) -> str:
+    """A title sharing the first `matched` characters of QUERY, so that
+    fuzz.ratio scores it exactly matched / 2."""
+    return QUERY[:matched] + "~" * (len(QUERY) - matched)
+
+
+def legacy_scan(title: str, corpus: list[str], threshold: int):
+    """The in-order scan matching used before score matrices, scoring like
+    fuzzywuzzy: exact ratio rounded half to even."""
+    best, best_score = None, threshold - 1
+    for index, choice in enumerate(corpus):
+        if title == choice:
+            return index, 100.0
+        total = len(title) + len(choice)
+        score = round(Fraction(100 * (total - Indel.distance(title, choice)), total))
+        if score > best_score:
+            best, best_score = index, score
+            if score >= 95:
+                break
+    return (best, float(best_score)) if best is not None else None
+
+
+@pytest.mark.parametrize(
+    "threshold, matched, expected",
+    [
+        # 84.5 rounds down to 84, 85.5 rounds up to 86
+        (85, [169], None),
+        (85, [171], (0, 86.0)),
+        (85, [169, 171], (1, 86.0)),
+        # 89.5 rounds up to the threshold
+        (90, [179], (0, 90.0)),
+        # 94.5 rounds down to 94, below the early-accept score
+        (95, [189], None),
+        (90, [189, 190], (1, 95.0)),
+        # Ties after rounding keep the first candidate (86.0, 86.5 and 85.5)
+        (85, [172, 173], (0, 86.0)),
+        (85, [171, 172, 173], (0, 86.0)),
+        (85, [173, 174], (1, 87.0)),
+        # The first early-accept score wins over a later, better one
+        (90, [191, 200], (0, 96.0)),
+        (90, [188, 191, 199], (1, 96.0)),
+    ],
+)
+def test_batch_rounds_like_legacy_scan(threshold, matched, expected):
+    corpus = [variant(m) for m in matched]
+    # Keep every blocking key so that each variant stays a candidate
+    _init_fuzzy_worker(TitleBlockingIndex(corpus, max_posting_ratio=1.0))
+
+    result = DataMatcher._fuzzy_match_batch(([QUERY], threshold))
+
+    assert result[QUERY] == expected
+    assert result[QUERY] == legacy_scan(QUERY, corpus, threshold)
+
+
+RECORDS = [
+    "Cowboy Bebop",
+    "Cowboy Bebop: Tengoku no Tobira",
+    "Trigun",
+    "Trigun Stampede",
+    "Neon Genesis Evangelion",
+    "Shingeki no Kyojin Season 2",
+]
+ITEMS = [
+    "Cowboy Bebop!",
+    "Trigun Stampede 2",
+    "Neon Genesis Evangelium",
+    "Shingeki no Kyojin Season 3",
+    "Something Else",
+]
+
+
+def fuzzy_match(matcher: DataMatcher, titles: list[str]) -> list[tuple[str, str]]:
+    records = [AnimeRecord(title=title) for title in RECORDS]
+    items = [{"title": title} for title in titles]
+    matches = matcher._fuzzy_match_parallel("kaize", items, records, threshold=85)
+    return [(item["title"], record.title) for item, record in matches]
+
+
+def test_cached_matches_equal_uncached(tmp_path, monkeypatch):
+    (tmp_path / "cached").mkdir()
+    first = DataMatcher(str(tmp_path / "cached"))
+    expected = fuzzy_match(first, ITEMS)
+    assert first.match_cache is not None
+    first.match_cache.save()
+    assert expected
+
+    # Every title is cached now, so nothing may be scored again
+    def no_pool(records):
+        raise AssertionError("cached titles were scored again")
+
+    cached = DataMatcher(str(tmp_path / "cached"))
+    monkeypatch.setattr(cached, "_get_pool", no_pool)
+    assert fuzzy_match(cached, ITEMS) == expected
+
+    (tmp_path / "uncached").mkdir()
+    assert fuzzy_match(DataMatcher(str(tmp_path / "uncached")), ITEMS) == expected
+
+
+def test_partially_cached_matches_equal_uncached(tmp_path):
+    (tmp_path / "cached").mkdir()
+    first = DataMatcher(str(tmp_path / "cached"))
+    fuzzy_match(first, ITEMS[:2])
+    assert first.match_cache is not None
+    first.match_cache.save()
+
+    (tmp_path / "uncached").mkdir()
+    assert fuzzy_match(DataMatcher(str(tmp_path / "cached")), ITEMS) == fuzzy_match(
+        DataMatcher(str(tmp_path / "uncached")), ITEMS
+    )
+
+
+def test_pool_closed_when_enhance_records_raises(tmp_path, monkeypatch):
+    kaize = [{"slug": "cowboy-bebop-tv", "kaize": 1, "title": "Cowboy Bebop!"}]
+    (tmp_path / "kaize.json").write_text(json.dumps(kaize), encoding="utf-8")
+    records = [AnimeRecord(title=title) for title in RECORDS]
+
+    matcher = DataMatcher(str(tmp_path))
+    pools = []
+    get_pool = matcher._get_pool
+
+    def tracked_pool(records):
+        pool = get_pool(records)
+        pools.append(pool)
+        return pool
+
+    def fail(records, title_lookup):
+        raise RuntimeError("nautiljon failed")
+
+    monkeypatch.setattr(matcher, "_get_pool", tracked_pool)
+    monkeypatch.setattr(matcher, "_link_nautiljon_data", fail)
+
+    with pytest.raises(RuntimeError):
+        matcher.enhance_records(records)
+
+    # The pool outlived the kaize phase and was shut down on the way out
+    assert pools and matcher.pool is None
+    assert not any(worker.is_alive() for worker in pools[0]._pool)
+
+
+def test_context_manager_closes_shared_pool(tmp_path):
+    with DataMatcher(str(tmp_path)) as matcher:
+        matcher.share_pool = True
+        fuzzy_match(matcher, ITEMS)
+        pool = matcher.pool
+        assert pool is not None
+
+    assert matcher.pool is None
+    assert not any(worker.is_alive() for worker in pool._pool)
+
+
+SOURCES = {
+    "arm.json": [
+        {"mal_id": 1, "anilist_id": 101, "syobocal_tid": 5001, "annict_id": 7001},
+        {"mal_id": 2, "anilist_id": 102, "syobocal_tid": 5002, "annict_id": 7002},
+    ],
+    "anitrakt_tv.json": [
+        {"mal_id": 1, "trakt_id": 9001, "type": "shows", "season": 1},
+        {"mal_id": 2, "trakt_id": 9002, "type": "shows", "season": 2},
+    ],
+    "fribb_animelists.json": [
+        {"anidb_id": 301, "imdb_id": "tt0213338", "themoviedb_id": "30991,30992"},
+    ],
+    "silveryasha.json": {
+        "data": [
+            {"id": 401, "mal_id": 1, "title": "Cowboy Bebop"},
+            {"id": 402, "title": "Trigun Stampede!"},
+        ]
+    },
+    "otakotaku.json": [
+        {"otakotaku": 501, "title": "Cowboy Bebop"},
+        {"otakotaku": 502, "title": "Neon Genesis Evangelium"},
+    ],
+    "kaize.json": [
+        {"slug": "trigun", "kaize": 601},
+        {"slug": "bebop-movie", "kaize": 602, "title": "Cowboy Bebop: Tengoku"},
+    ],
+    "nautiljon.json": [
+        {"title": "Trigun", "slug": "trigun", "entry_id": 701},
+        {"title": "Shingeki no Kyojin Saison 2", "slug": "snk-2", "entry_id": 702},
+    ],
+    "kaize_manual.json": {"Neon Genesis Evangelion": {"kaize": "eva", "kaize_id": 603}},
+}
+
+
+def base_records() -> list[AnimeRecord]:
+    return [
+        AnimeRecord(title="Cowboy Bebop", myanimelist=1, anidb=301),
+        AnimeRecord(title="Cowboy Bebop: Tengoku no Tobira"),
+        # ARM sets the same Annict ID, so the stored arm changes omit it
+        AnimeRecord(title="Trigun", anilist=102, annict=7002),
+        AnimeRecord(title="Trigun Stampede"),
+        AnimeRecord(title="Neon Genesis Evangelion", kitsu=21),
+        AnimeRecord(title="Shingeki no Kyojin Season 2"),
+    ]
+
+
+def write_sources(cache_dir, sources) -> None:
+    cache_dir.mkdir(exist_ok=True)
+    for filename, data in sources.items():
+        (cache_dir / filename).write_text(json.dumps(data), encoding="utf-8")
+
+
+def link(cache_dir, records, replay: bool) -> list[dict]:
+    with DataMatcher(str(cache_dir), incremental=replay) as matcher:
+        return [r.to_dict() for r in matcher.enhance_records(records)]
+
+
+def full_relink(tmp_path, sources, records) -> list[dict]:
+    write_sources(tmp_path / "full", sources)
+    return link(tmp_path / "full", records, replay=False)
+
+
+def test_replay_off_by_default(tmp_path):
+    assert DataMatcher(str(tmp_path)).incremental is False
+
+
+def test_replay_of_unchanged_sources_equals_full_relink(tmp_path, monkeypatch):
+    write_sources(tmp_path / "replay", SOURCES)
+    first = link(tmp_path / "replay", base_records(), replay=True)
+
+    # Nothing changed, so no phase may link again
+    def no_linking(*args):
+        raise AssertionError("unchanged phase was linked again")
+
+    for method in ("_combine_arm_data", "_link_kaize_data", "_apply_manual_mappings"):
+        monkeypatch.setattr(DataMatcher, method, no_linking)
+    replayed = link(tmp_path / "replay", base_records(), replay=True)
+    monkeypatch.undo()
+
+    assert replayed == first == full_relink(tmp_path, SOURCES, base_records())
+    assert replayed != [r.to_dict() for r in base_records()]
+
+
+def test_replay_after_source_change_equals_full_relink(tmp_path):
+    write_sources(tmp_path / "replay", SOURCES)
+    link(tmp_path / "replay", base_records(), replay=True)
+
+    # ARM now maps AniList 102 to another MAL ID, which AniTrakt reads
+    changed = {
+        **SOURCES,
+        "arm.json": [
+            SOURCES["arm.json"][0],
+            {"mal_id": 1, "anilist_id": 102, "syobocal_tid": 5003, "annict_id": 0},
+        ],
+    }
+    write_sources(tmp_path / "replay", changed)
+    replayed = link(tmp_path / "replay", base_records(), replay=True)
+
+    assert replayed == full_relink(tmp_path, changed, base_records())
+    assert replayed[2]["trakt"] == 9001
+
+
+@pytest.mark.parametrize(
+    "field, value",
+    [("title", "Trigun (1998)"), ("anidb", 999), ("kitsu", 22), ("annict", 7009)],
+)
+def test_replay_after_base_change_equals_full_relink(tmp_path, field, value):
+    write_sources(tmp_path / "replay", SOURCES)
+    link(tmp_path / "replay", base_records(), replay=True)
+
+    def changed_records() -> list[AnimeRecord]:
+        records = base_records()
+        setattr(records[2], field, value)
+        return records
+
+    replayed = link(tmp_path / "replay", changed_records(), replay=True)
+
+    assert replayed == full_relink(tmp_path, SOURCES, changed_records())
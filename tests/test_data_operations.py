@@ -0,0 +1,123 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# Copyright 2025 tajoumaru
+
+import asyncio
+
+import pytest
+from sqlalchemy import text
+
+from generator import data_operations
+from generator.anime_record import AnimeRecord
+from generator.async_data_operations import AsyncSQLAlchemyOperations
+
+
+def first_run() -> list[AnimeRecord]:
+    return [
+        AnimeRecord(title="Cowboy Bebop", myanimelist=1, kitsu=1),
+        AnimeRecord(title="Trigun", myanimelist=6, kitsu=7),
+        AnimeRecord(title="Monster", myanimelist=19),
+        AnimeRecord(title="Mushishi", myanimelist=457),
+        AnimeRecord(title="Untitled OVA"),
+        AnimeRecord(title="Unaired Special", kaize="unaired-special"),
+    ]
+
+
+def second_run() -> list[AnimeRecord]:
+    return [
+        # Update matched by MAL ID, with a new title
+        AnimeRecord(title="Cowboy Bebop (TV)", myanimelist=1, kitsu=1),
+        AnimeRecord(title="Trigun", myanimelist=6, kitsu=7),
+        # Update matched by title
+        AnimeRecord(title="Untitled OVA", anidb=4242),
+        AnimeRecord(title="Unaired Special", kaize="unaired-special"),
+        # Inserts, Monster and Mushishi are deleted
+        AnimeRecord(title="Planetes", myanimelist=329),
+        AnimeRecord(title="Another OVA"),
+    ]
+
+
+def third_run() -> list[AnimeRecord]:
+    records = second_run()
+    records[1].trakt = 123
+    return records
+
+
+def snapshot(ops) -> tuple[list, list]:
+    with ops.engine.connect() as conn:
+        anime = conn.execute(text("SELECT * FROM anime ORDER BY id")).mappings()
+        rows = [
+            {k: v for k, v in row.items() if k not in ("created_at", "updated_at")}
+            for row in anime
+        ]
+        log = conn.execute(
+            text("SELECT anime_id, change_type FROM change_log ORDER BY id")
+        ).all()
+    return rows, sorted(tuple(entry) for entry in log)
+
+
+def reset(ops) -> None:
+    with ops.engine.begin() as conn:
+        conn.execute(text("TRUNCATE anime, change_log RESTART IDENTITY"))
+
+
+@pytest.mark.parametrize("copy_format", ["text", "binary"])
+def test_merge_records_matches_client_path(operations, monkeypatch, copy_format):
+    monkeypatch.setattr(data_operations, "COPY_FORMAT", copy_format)
+    # The last run switches hash algorithm, which rehashes unchanged rows
+    runs = [("sha256", first_run), ("sha256", second_run), ("xxh3", third_run)]
+
+    client, server = [], []
+    for algorithm, records in runs:
+        monkeypatch.setattr(data_operations, "RECORD_HASH_ALGORITHM", algorithm)
+        operations.apply_changes(operations.detect_changes(records()))
+        client.append(snapshot(operations))
+
+    reset(operations)
+    counts = []
+    for algorithm, records in runs:
+        monkeypatch.setattr(data_operations, "RECORD_HASH_ALGORITHM", algorithm)
+        counts.append(operations.merge_records(records()))
+        server.append(snapshot(operations))
+
+    assert server == client
+    assert counts == [
+        {"inserted": 6, "updated": 0, "deleted": 0, "rehashed": 0},
+        {"inserted": 2, "updated": 2, "deleted": 2, "rehashed": 0},
+        {"inserted": 0, "updated": 1, "deleted": 0, "rehashed": 5},
+    ]
+
+
+def test_async_client_path_matches_sync(operations, monkeypatch):
+    runs = [("sha256", first_run), ("sha256", second_run), ("xxh3", third_run)]
+
+    sync = []
+    for algorithm, records in runs:
+        monkeypatch.setattr(data_operations, "RECORD_HASH_ALGORITHM", algorithm)
+        operations.apply_changes(operations.detect_changes(records()))
+        sync.append(snapshot(operations))
+    sync_pending = [change.id for change in operations.get_pending_changes()]
+
+    reset(operations)
+
+    async def run_async() -> tuple[list, list[int]]:
+        async_operations = AsyncSQLAlchemyOperations(operations.db_path)
+        try:
+            snapshots = []
+            for algorithm, records in runs:
+                monkeypatch.setattr(data_operations, "RECORD_HASH_ALGORITHM", algorithm)
+                changeset = await async_operations.detect_changes(records())
+                await async_operations.apply_changes(changeset)
+                snapshots.append(snapshot(operations))
+            pending = await async_operations.get_pending_changes()
+            await async_operations.mark_changes_processed(
+                [change.id for change in pending]
+            )
+            return snapshots, [change.id for change in pending]
+        finally:
+            await async_operations.close()
+
+    snapshots, pending = asyncio.run(run_async())
+
+    assert snapshots == sync
+    assert pending == sync_pending
+    assert operations.get_pending_changes() == []
@@ -0,0 +1,52 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# Copyright 2025 tajoumaru
+
+import pytest
+
+from generator import incremental_kv_ingest
+from generator.anime_record import AnimeRecord
+from generator.incremental_kv_ingest import IncrementalKVIngest
+from generator.kv_codec import ValueCodec, build_dictionary, compact_json
+from generator.models import ChangeLog
+
+BEBOP = AnimeRecord(
+    title="Cowboy Bebop",
+    myanimelist=1,
+    kitsu=1,
+    trakt=30,
+    trakt_type="shows",
+    trakt_season=1,
+)
+TRIGUN = AnimeRecord(title="Trigun", myanimelist=6, kitsu=7)
+
+
+def change(anime_id: int, change_type: str) -> ChangeLog:
+    return ChangeLog(id=anime_id, anime_id=anime_id, change_type=change_type)
+
+
+@pytest.mark.parametrize("layout", ["keys", "hash"])
+def test_undecodable_data_falls_back_to_keys_by_owner(kv_store, monkeypatch, layout):
+    monkeypatch.setattr(incremental_kv_ingest, "KV_LAYOUT", layout)
+    ingest = IncrementalKVIngest()
+    ingest.write_changes(
+        [change(1, "insert"), change(2, "insert")], {1: BEBOP, 2: TRIGUN}
+    )
+
+    # Bebop was written with a deflate dictionary this ingest never saw
+    other = ValueCodec("deflate")
+    other.set_dictionary(build_dictionary([compact_json(BEBOP)]))
+    kv_store.set("1", other.encode(BEBOP))
+    with pytest.raises(ValueError):
+        ingest.codec.decode(kv_store.get("1"))
+
+    # Bebop drops its Kitsu and Trakt IDs
+    renamed = AnimeRecord(title="Cowboy Bebop (TV)", myanimelist=1)
+    ingest.write_changes([change(1, "update")], {1: renamed})
+
+    assert ingest.resolve("myanimelist/1") == renamed
+    assert ingest.resolve("kitsu/1") is None
+    assert ingest.resolve("trakt/shows/30") is None
+    assert ingest.resolve("trakt/shows/30/seasons/1") is None
+    # Keys of other anime are left alone
+    assert ingest.resolve("kitsu/7") == TRIGUN
+    assert ingest.resolve("myanimelist/6") == TRIGUN
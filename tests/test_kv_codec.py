@@ -0,0 +1,72 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# Copyright 2025 tajoumaru
+
+import pytest
+
+from generator.anime_record import AnimeRecord
+from generator.kv_codec import (
+    KV_CODECS,
+    ValueCodec,
+    build_dictionary,
+    codec_size_report,
+    compact_json,
+)
+
+RECORDS = [
+    AnimeRecord(
+        title=f"Title {i}",
+        myanimelist=i,
+        kitsu=-i,
+        trakt=i * 7,
+        trakt_type="shows",
+        trakt_season=1,
+    )
+    for i in range(1, 20)
+]
+
+
+@pytest.mark.parametrize("text_only", [False, True])
+@pytest.mark.parametrize("name", KV_CODECS)
+def test_round_trip(name, text_only):
+    codec = ValueCodec(name, text_only=text_only)
+    codec.set_dictionary(build_dictionary([compact_json(r) for r in RECORDS]))
+
+    for record in RECORDS:
+        value = codec.encode(record)
+        if text_only:
+            assert isinstance(value, str)
+        decoded = codec.decode(value)
+        decoded.data_hash = record.data_hash
+        assert decoded == record
+
+
+def test_decode_reads_every_codec():
+    dictionary = build_dictionary([compact_json(r) for r in RECORDS])
+    reader = ValueCodec("json")
+    reader.set_dictionary(dictionary)
+
+    for name in KV_CODECS:
+        writer = ValueCodec(name)
+        writer.set_dictionary(dictionary)
+        assert reader.decode(writer.encode(RECORDS[0])).title == "Title 1"
+
+
+def test_decode_rejects_unknown_dictionary():
+    writer = ValueCodec("deflate")
+    writer.set_dictionary(b"some dictionary")
+
+    with pytest.raises(ValueError):
+        ValueCodec("deflate").decode(writer.encode(RECORDS[0]))
+
+
+def test_unsupported_codec():
+    with pytest.raises(ValueError):
+        ValueCodec("msgpack")
+
+
+def test_codec_size_report():
+    report = codec_size_report(RECORDS)
+
+    assert report["records"] == len(RECORDS)
+    assert report["dictionary"] > 0
+    assert report["deflate"] < report["compact"] < report["json"]
@@ -0,0 +1,49 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# Copyright 2025 tajoumaru
+
+from generator.match_cache import FuzzyMatchCache, corpus_fingerprint
+
+CORPUS = corpus_fingerprint(["Cowboy Bebop", "Trigun"])
+MATCHES = {"Cowboy Bebop!": (0, 96.0), "Unknown": None}
+
+
+def stored_cache(cache_dir, fingerprint=CORPUS) -> FuzzyMatchCache:
+    cache = FuzzyMatchCache(str(cache_dir), fingerprint)
+    cache.set_matches("kaize", 85, MATCHES)
+    cache.save()
+    return FuzzyMatchCache(str(cache_dir), fingerprint)
+
+
+def test_hit_returns_stored_matches(tmp_path):
+    cache = stored_cache(tmp_path)
+
+    assert cache.get_matches("kaize", 85) == MATCHES
+
+
+def test_miss_for_other_platform(tmp_path):
+    cache = stored_cache(tmp_path)
+
+    assert cache.get_matches("nautiljon", 85) == {}
+
+
+def test_miss_without_cache_file(tmp_path):
+    assert FuzzyMatchCache(str(tmp_path), CORPUS).get_matches("kaize", 85) == {}
+
+
+def test_threshold_change_invalidates_platform(tmp_path):
+    cache = stored_cache(tmp_path)
+
+    assert cache.get_matches("kaize", 90) == {}
+
+
+def test_corpus_change_invalidates_cache(tmp_path):
+    stored_cache(tmp_path)
+
+    changed = corpus_fingerprint(["Trigun", "Cowboy Bebop"])
+    assert FuzzyMatchCache(str(tmp_path), changed).get_matches("kaize", 85) == {}
+
+
+def test_unreadable_cache_is_ignored(tmp_path):
+    (tmp_path / "fuzzy_match_cache.json").write_text("{", encoding="utf-8")
+
+    assert FuzzyMatchCache(str(tmp_path), CORPUS).get_matches("kaize", 85) == {}
@@ -0,0 +1,77 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# Copyright 2025 tajoumaru
+
+import asyncio
+
+import pytest
+from sqlalchemy import text
+
+from generator import pipeline
+from generator.anime_record import AnimeRecord
+from generator.pipeline import SQLAlchemyPipeline
+
+
+def runs() -> list[list[AnimeRecord]]:
+    first = [
+        AnimeRecord(title="Cowboy Bebop", myanimelist=1, kitsu=1),
+        AnimeRecord(title="Trigun", myanimelist=6, kitsu=7),
+        AnimeRecord(title="Monster", myanimelist=19, anidb=4),
+        AnimeRecord(title="Untitled OVA"),
+    ]
+    second = [
+        # The title changes, the MAL ID is kept
+        AnimeRecord(title="Cowboy Bebop (TV)", myanimelist=1, kitsu=1),
+        # Trigun moves to another Kitsu ID, Monster is deleted
+        AnimeRecord(title="Trigun", myanimelist=6, kitsu=8),
+        AnimeRecord(title="Untitled OVA", anidb=4242),
+        AnimeRecord(title="Planetes", myanimelist=329, trakt=9, trakt_type="shows"),
+        AnimeRecord(title="Mushishi", myanimelist=457),
+    ]
+    return [first, second]
+
+
+def ingest(operations, kv_store, tmp_path, database_async: bool) -> list[dict]:
+    """Apply and ingest each run, returning the KV contents after each."""
+    with operations.engine.begin() as conn:
+        conn.execute(text("TRUNCATE anime, change_log RESTART IDENTITY"))
+    kv_store.flushdb()
+
+    contents = []
+    with SQLAlchemyPipeline(operations.db_path, str(tmp_path)) as runner:
+        for records in runs():
+            if database_async:
+                asyncio.run(runner._apply_records_async(records))
+            else:
+                runner.operations.apply_changes(
+                    runner.operations.detect_changes(records)
+                )
+            result = runner.run_kv_ingestion_phase()
+            assert result["success"]
+            assert result["changes_processed"] > 0
+            contents.append({key: kv_store.get(key) for key in kv_store.keys("*")})
+        assert runner.operations.get_pending_changes() == []
+    return contents
+
+
+@pytest.mark.parametrize("chunk_size", [5000, 2])
+def test_async_ingestion_matches_sync(
+    operations, kv_store, tmp_path, monkeypatch, chunk_size
+):
+    monkeypatch.setattr(pipeline, "DATABASE_ASYNC", False)
+    expected = ingest(operations, kv_store, tmp_path, database_async=False)
+
+    ingest_changes = SQLAlchemyPipeline._ingest_changes_async
+    monkeypatch.setattr(
+        SQLAlchemyPipeline,
+        "_ingest_changes_async",
+        lambda self, kv_ingest: ingest_changes(self, kv_ingest, chunk_size),
+    )
+    monkeypatch.setattr(pipeline, "DATABASE_ASYNC", True)
+    contents = ingest(operations, kv_store, tmp_path, database_async=True)
+
+    assert contents == expected
+    # Deleted anime and the keys they or older versions owned are gone
+    assert b"myanimelist/19" in expected[0]
+    assert b"myanimelist/19" not in expected[1]
+    assert b"kitsu/7" not in expected[1]
+    assert b"kitsu/8" in expected[1]
@@ -0,0 +1,75 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# Copyright 2025 tajoumaru
+
+import json
+from typing import Any
+
+import pytest
+
+from generator.status_updater import PLATFORMS, StatusUpdater
+
+
+class FakeOperations:
+    def __init__(self):
+        self.snapshot: dict[str, Any] = {
+            "total": 2,
+            "max_id": 2,
+            "updated_at": "2025-01-01T00:00:00",
+        }
+        self.count_queries = 0
+
+    def get_anime_snapshot(self):
+        return dict(self.snapshot)
+
+    def get_platform_counts(self, platforms):
+        self.count_queries += 1
+        counts: dict[str, Any] = {platform: 1 for platform in platforms}
+        counts["total"] = self.snapshot["total"]
+        return counts
+
+
+@pytest.fixture
+def updater(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "api").mkdir()
+    return StatusUpdater(FakeOperations())
+
+
+def stored_status():
+    with open("api/status.json", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_reuses_counts_stored_with_matching_snapshot(updater):
+    updater.update_status_file()
+    updater.update_status_file(data_changed=False)
+
+    assert updater.operations.count_queries == 1
+    assert stored_status()["snapshot"] == updater.operations.snapshot
+
+
+@pytest.mark.parametrize(
+    "change",
+    [
+        {"total": 1},
+        {"max_id": 3},
+        {"updated_at": "2025-01-02T00:00:00"},
+    ],
+)
+def test_recounts_when_table_snapshot_changed(updater, change):
+    updater.update_status_file()
+    updater.operations.snapshot.update(change)
+    updater.update_status_file(data_changed=False)
+
+    assert updater.operations.count_queries == 2
+    assert stored_status()["counts"]["total"] == updater.operations.snapshot["total"]
+
+
+def test_recounts_counts_stored_without_snapshot(updater):
+    counts = {platform: 0 for platform in [*PLATFORMS, "total"]}
+    with open("api/status.json", "w", encoding="utf-8") as f:
+        json.dump({"counts": counts}, f)
+
+    updater.update_status_file(data_changed=False)
+
+    assert updater.operations.count_queries == 1
@@ -0,0 +1,91 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# Copyright 2025 tajoumaru
+
+import random
+
+import numpy as np
+import pytest
+from rapidfuzz import fuzz
+
+# The stub only declares cdist when numpy imports, which it always does here
+from rapidfuzz.process import cdist  # ty: ignore[possibly-unbound-import]
+
+from generator.data_matcher import DataMatcher, _init_fuzzy_worker
+from generator.title_index import TitleBlockingIndex
+
+SYLLABLES = ["ka", "shi", "no", "mi", "ra", "to", "yu", "ki", "ha", "ne"]
+SUFFIXES = ["", " 2nd Season", " Season 2", " The Movie", " OVA", ": Final"]
+
+
+def make_corpus(size: int, seed: int = 5) -> list[str]:
+    # Enough distinct words that most tokens and n-grams stay in the index
+    rng = random.Random(seed)
+    words = sorted(
+        {
+            "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+            for _ in range(400)
+        }
+    )
+    return [
+        " ".join(rng.sample(words, rng.randint(2, 4))).title() + rng.choice(SUFFIXES)
+        for _ in range(size)
+    ]
+
+
+def make_queries(corpus: list[str], seed: int = 11) -> list[str]:
+    """Near misses of corpus titles: other seasons, dropped words and typos."""
+    rng = random.Random(seed)
+    queries = set()
+    for title in rng.sample(corpus, 150):
+        base = title
+        for suffix in SUFFIXES[1:]:
+            base = base.removesuffix(suffix)
+        queries.update(base + suffix for suffix in SUFFIXES)
+
+        words = title.split(" ")
+        queries.add(" ".join(words[:1] + words[2:]))
+        position = rng.randrange(len(title))
+        queries.add(title[:position] + title[position + 1 :])
+    queries.update(["Completely Unrelated", "Zzz", ""])
+    return sorted(queries)
+
+
+def exhaustive_match(titles, corpus, threshold):
+    """Score every title against the whole corpus, as the pre-index scan did."""
+    scores = np.rint(
+        cdist(titles, corpus, scorer=fuzz.ratio, score_cutoff=threshold - 0.5)
+    )
+    matches = {}
+    for row, title in enumerate(titles):
+        early = np.flatnonzero(scores[row] >= 95)
+        best = early[0] if len(early) else int(scores[row].argmax())
+        score = float(scores[row, best])
+        matches[title] = (int(best), score) if score >= threshold else None
+    return matches
+
+
+@pytest.mark.parametrize("max_candidates", [300, 25])
+@pytest.mark.parametrize("threshold", [85, 90, 95])
+def test_blocked_matches_equal_exhaustive_scan(threshold, max_candidates):
+    corpus = make_corpus(2000)
+    queries = make_queries(corpus)
+    index = TitleBlockingIndex(corpus, max_candidates=max_candidates)
+    _init_fuzzy_worker(index)
+
+    # Blocking has to actually cut candidates for the comparison to count
+    sizes = [len(index.candidates(title, threshold)) for title in queries]
+    assert sum(sizes) < len(queries) * len(corpus) // 10
+
+    blocked = DataMatcher._fuzzy_match_batch((queries, threshold))
+
+    assert blocked == exhaustive_match(queries, corpus, threshold)
+
+
+def test_candidates_keep_exact_title_and_corpus_order():
+    corpus = make_corpus(500)
+    index = TitleBlockingIndex(corpus, max_candidates=5)
+
+    for title in corpus[:50]:
+        candidates = index.candidates(title, 85)
+        assert corpus.index(title) in candidates
+        assert candidates == sorted(candidates)